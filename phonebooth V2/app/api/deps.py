@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterator
 from uuid import UUID
 
 from fastapi import Depends, Header, HTTPException, status
@@ -5,8 +6,9 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import verify_supabase_jwt
-from app.db.session import get_db
+from app.db.session import ReplicaSessionLocal, get_db, get_replica_engine, mark_writer, recent_writers
 from app.models import Channel, Server, ServerMember, User
+from app.services.user_service import resolve_user
 
 
 async def get_or_create_user_from_token(db: AsyncSession, token: str) -> User:
@@ -21,19 +23,7 @@ async def get_or_create_user_from_token(db: AsyncSession, token: str) -> User:
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user id in token") from exc
 
-    stmt = select(User).where(User.supabase_user_id == supabase_user_id)
-    user = (await db.execute(stmt)).scalar_one_or_none()
-
-    if user is None:
-        raw_meta = payload.get("user_metadata") or {}
-        username = raw_meta.get("username") or raw_meta.get("full_name") or payload.get("email") or f"user-{str(supabase_user_id)[:8]}"
-        avatar_url = raw_meta.get("avatar_url")
-        user = User(supabase_user_id=supabase_user_id, username=username, avatar_url=avatar_url)
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-
-    return user
+    return await resolve_user(db, supabase_user_id, payload)
 
 
 async def get_current_user(
@@ -44,7 +34,20 @@ async def get_current_user(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
 
     token = authorization.split(" ", 1)[1]
-    return await get_or_create_user_from_token(db, token)
+    user = await get_or_create_user_from_token(db, token)
+    mark_writer(db, user.id)
+    return user
+
+
+async def get_read_db(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> AsyncIterator[AsyncSession]:
+    if get_replica_engine() is None or recent_writers.active(current_user.id):
+        yield db
+        return
+    async with ReplicaSessionLocal() as session:
+        yield session
 
 
 async def require_server_member(db: AsyncSession, server_id: UUID, user_id: UUID) -> ServerMember:
@@ -74,3 +77,8 @@ async def require_channel_member(db: AsyncSession, channel_id: UUID, user_id: UU
     if channel is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No access to channel")
     return channel
+
+
+async def list_member_server_ids(db: AsyncSession, user_id: UUID) -> set[UUID]:
+    stmt = select(ServerMember.server_id).where(ServerMember.user_id == user_id)
+    return set((await db.execute(stmt)).scalars().all())
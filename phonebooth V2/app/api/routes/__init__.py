@@ -1,3 +1,3 @@
-from app.api.routes import auth, channels, messages, servers
+from app.api.routes import auth, channels, deletions, messages, read_states, servers
 
-__all__ = ["auth", "servers", "channels", "messages"]
+__all__ = ["auth", "servers", "channels", "messages", "read_states", "deletions"]
@@ -0,0 +1,102 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_read_db, require_channel_member
+from app.core.config import get_settings
+from app.core.serialization import JSONBytesResponse, columns_for, rows_response
+from app.db.session import get_db
+from app.models import Attachment, Message, User
+from app.schemas.attachment import AttachmentOut
+from app.services.attachment_store import AttachmentTooLarge, attachment_store
+from app.services.events import event_bus
+
+router = APIRouter(prefix="/channels/{channel_id}/messages/{message_id}/attachments", tags=["attachments"])
+
+
+@router.post("", response_model=AttachmentOut, status_code=status.HTTP_201_CREATED)
+async def upload_attachment(
+    channel_id: UUID,
+    message_id: UUID,
+    request: Request,
+    filename: str = Query(min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> AttachmentOut:
+    # The body is the raw file; rejecting on Content-Length spares the upload when the client declares it.
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > get_settings().attachment_max_bytes:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Attachment too large")
+
+    await require_channel_member(db, channel_id, current_user.id)
+    stmt = select(Message.author_id).where(Message.id == message_id, Message.channel_id == channel_id)
+    author_id = (await db.execute(stmt)).scalar_one_or_none()
+    if author_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+    if author_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot attach to another user's message")
+    # Hand the pooled connection back while the body streams in; uploads can take far longer than any query.
+    await db.commit()
+
+    try:
+        blob = await attachment_store.put(request.stream(), get_settings().attachment_max_bytes)
+    except AttachmentTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Attachment too large") from exc
+
+    # The message may have been deleted while the body streamed. Locking its row keeps a concurrent delete waiting
+    # until this insert commits, so delete_message also removes the new attachment row.
+    if (await db.execute(stmt.with_for_update())).scalar_one_or_none() is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+
+    attachment = Attachment(
+        message_id=message_id,
+        channel_id=channel_id,
+        uploader_id=current_user.id,
+        filename=filename,
+        content_type=request.headers.get("content-type") or "application/octet-stream",
+        size=blob.size,
+        sha256=blob.sha256,
+    )
+    db.add(attachment)
+    await db.flush()
+    await db.refresh(attachment)
+    out = AttachmentOut.model_validate(attachment, from_attributes=True)
+    event_bus.emit(db, "ATTACHMENT_CREATE", out.model_dump(mode="json"), channel_id=channel_id)
+    await db.commit()
+    return out
+
+
+@router.get("", response_model=list[AttachmentOut])
+async def list_attachments(
+    channel_id: UUID,
+    message_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+) -> JSONBytesResponse:
+    await require_channel_member(db, channel_id, current_user.id)
+    stmt = (
+        select(*columns_for(Attachment, AttachmentOut))
+        .where(Attachment.message_id == message_id, Attachment.channel_id == channel_id)
+        .order_by(Attachment.created_at.asc())
+    )
+    return rows_response(await db.execute(stmt))
+
+
+@router.get("/{attachment_id}")
+async def download_attachment(
+    channel_id: UUID,
+    message_id: UUID,
+    attachment_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    await require_channel_member(db, channel_id, current_user.id)
+    stmt = select(Attachment.sha256, Attachment.filename, Attachment.content_type).where(
+        Attachment.id == attachment_id, Attachment.message_id == message_id, Attachment.channel_id == channel_id
+    )
+    attachment = (await db.execute(stmt)).first()
+    if attachment is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Attachment not found")
+    return attachment_store.response(attachment.sha256, attachment.filename, attachment.content_type)
@@ -1,13 +1,18 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, require_server_member, require_server_owner
+from app.api.deps import get_current_user, get_read_db, require_server_member, require_server_owner
+from app.api.routes.deletions import delete_or_schedule
+from app.core.etags import listing_etag, not_modified, tag_response
+from app.core.serialization import columns_for, rows_response
 from app.db.session import get_db
 from app.models import Channel, User
 from app.schemas.channel import ChannelOut, CreateChannelIn
+from app.schemas.deletion import DeletionJobOut
+from app.services.events import event_bus
 
 router = APIRouter(tags=["channels"])
 
@@ -27,33 +32,49 @@ async def create_channel(
         position=payload.position,
     )
     db.add(channel)
-    await db.commit()
+    await db.flush()
     await db.refresh(channel)
-    return ChannelOut.model_validate(channel, from_attributes=True)
+    out = ChannelOut.model_validate(channel, from_attributes=True)
+    event_bus.emit(db, "CHANNEL_CREATE", out.model_dump(mode="json"), server_id=server_id)
+    await db.commit()
+    return out
 
 
 @router.get("/servers/{server_id}/channels", response_model=list[ChannelOut])
 async def list_channels(
     server_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
-) -> list[ChannelOut]:
+) -> Response:
     await require_server_member(db, server_id, current_user.id)
-    stmt = select(Channel).where(Channel.server_id == server_id).order_by(Channel.position.asc(), Channel.created_at.asc())
-    channels = (await db.execute(stmt)).scalars().all()
-    return [ChannelOut.model_validate(channel, from_attributes=True) for channel in channels]
+    # Listed channel rows are never updated, so creates and deletes are the only changes and both move this pair.
+    version = select(func.count(), func.max(Channel.created_at)).where(Channel.server_id == server_id)
+    etag = listing_etag(current_user.id, "channels", server_id, *(await db.execute(version)).one())
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+
+    stmt = (
+        select(*columns_for(Channel, ChannelOut))
+        .where(Channel.server_id == server_id)
+        .order_by(Channel.position.asc(), Channel.created_at.asc())
+    )
+    return tag_response(rows_response(await db.execute(stmt)), etag)
 
 
-@router.delete("/channels/{channel_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/channels/{channel_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_202_ACCEPTED: {"model": DeletionJobOut}},
+)
 async def delete_channel(
     channel_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> None:
+) -> Response:
     channel = (await db.execute(select(Channel).where(Channel.id == channel_id))).scalar_one_or_none()
     if channel is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Channel not found")
 
     await require_server_owner(db, channel.server_id, current_user.id)
-    await db.delete(channel)
-    await db.commit()
+    return await delete_or_schedule(db, "channel", channel_id, current_user.id)
@@ -0,0 +1,43 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.core.config import get_settings
+from app.core.serialization import JSONBytesResponse
+from app.db.session import get_db
+from app.models import DeletionJob, User
+from app.schemas.deletion import DeletionJobOut
+from app.services.deletion_service import DeletionKind, bulk_deleter, delete_now, pending_message_count
+
+router = APIRouter(prefix="/deletions", tags=["deletions"])
+
+
+def _job_response(job: DeletionJob, status_code: int = status.HTTP_200_OK) -> JSONBytesResponse:
+    return JSONBytesResponse(DeletionJobOut.model_validate(job, from_attributes=True).model_dump(), status_code=status_code)
+
+
+async def delete_or_schedule(db: AsyncSession, kind: DeletionKind, target_id: UUID, user_id: UUID) -> Response:
+    settings = get_settings()
+    total = await pending_message_count(db, kind, target_id)
+    if total <= settings.bulk_delete_inline_max_messages:
+        await delete_now(db, kind, target_id)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+    job = await bulk_deleter.schedule(db, kind, target_id, user_id, total)
+    response = _job_response(job, status.HTTP_202_ACCEPTED)
+    response.headers["Location"] = f"{settings.api_prefix}/deletions/{job.id}"
+    return response
+
+
+@router.get("/{job_id}", response_model=DeletionJobOut)
+async def get_deletion(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> JSONBytesResponse:
+    job = await bulk_deleter.get(db, job_id)
+    if job is None or job.requested_by != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Deletion job not found")
+    return _job_response(job)
@@ -1,19 +1,29 @@
-from datetime import datetime
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, require_channel_member
+from app.api.deps import get_current_user, get_read_db, require_channel_member
+from app.core.config import get_settings
+from app.core.serialization import JSONBytesResponse
 from app.db.session import get_db
 from app.models import Message, User
-from app.schemas.message import CreateMessageIn, MessageOut, UpdateMessageIn
-from app.services.message_service import create_message, edit_message, list_messages
+from app.schemas.message import CreateMessageIn, MessageOut, MessagePageOut, MessageSearchOut, UpdateMessageIn
+from app.services.message_cache import CachedMessage, message_cache
+from app.services.message_service import create_message, delete_message, edit_message, list_messages
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.search_service import search_messages
 
 router = APIRouter(prefix="/channels/{channel_id}/messages", tags=["messages"])
 
 
+def _render_page(items: list[CachedMessage], has_more: bool) -> JSONBytesResponse:
+    before = f'"{items[-1].cursor}"' if items and has_more else "null"
+    after = f'"{items[0].cursor}"' if items else "null"
+    return JSONBytesResponse(b'{"items":[' + b",".join(item.payload for item in items) + f'],"before":{before},"after":{after}}}'.encode())
+
+
 @router.post("", response_model=MessageOut, status_code=status.HTTP_201_CREATED)
 async def create_message_route(
     channel_id: UUID,
@@ -22,21 +32,68 @@ async def create_message_route(
     current_user: User = Depends(get_current_user),
 ) -> MessageOut:
     await require_channel_member(db, channel_id, current_user.id)
-    message = await create_message(db, channel_id, current_user.id, payload.content)
+    try:
+        message = await create_message(db, channel_id, current_user.id, payload.content, payload.nonce)
+    except LookupError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
     return MessageOut.model_validate(message, from_attributes=True)
 
 
-@router.get("", response_model=list[MessageOut])
+@router.get("", response_model=MessagePageOut)
 async def list_channel_messages(
     channel_id: UUID,
     limit: int = Query(default=50, ge=1, le=100),
-    before: datetime | None = Query(default=None),
+    before: str | None = Query(default=None),
+    after: str | None = Query(default=None),
     db: AsyncSession = Depends(get_db),
+    read_db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+) -> JSONBytesResponse:
+    if before and after:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either before or after, not both")
+    try:
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+    await require_channel_member(read_db, channel_id, current_user.id)
+
+    if before_key is None and after_key is None and get_settings().message_cache_enabled:
+        cached = message_cache.page(channel_id, limit)
+        if cached is None:
+            # Fill from the primary: a lagging replica would leave the cache missing messages until eviction.
+            token = message_cache.begin_fill(channel_id)
+            rows, has_more = await list_messages(db, channel_id, message_cache.channel_size)
+            items = message_cache.fill(channel_id, token, rows, complete=not has_more)
+            cached = items[:limit], len(items) > limit or has_more
+        return _render_page(*cached)
+
+    rows, has_more = await list_messages(read_db, channel_id, limit, before_key, after_key)
+
+    # Older pages always exist when paging forward from a cursor; newer ones may appear at any time.
+    older_exists = has_more if after_key is None else bool(rows)
+    return JSONBytesResponse(
+        {
+            "items": [row._asdict() for row in rows],
+            "before": encode_cursor(rows[-1]) if rows and older_exists else None,
+            "after": encode_cursor(rows[0]) if rows else after,
+        }
+    )
+
+
+@router.get("/search", response_model=MessageSearchOut)
+async def search_channel_messages(
+    channel_id: UUID,
+    q: str = Query(min_length=1, max_length=200, pattern=r"\S"),
+    limit: int = Query(default=25, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
-) -> list[MessageOut]:
+) -> JSONBytesResponse:
     await require_channel_member(db, channel_id, current_user.id)
-    rows = await list_messages(db, channel_id, limit, before)
-    return [MessageOut.model_validate(item, from_attributes=True) for item in rows]
+    rows, has_more = await search_messages(db, q, limit, offset, channel_id=channel_id)
+    return JSONBytesResponse({"items": [row._asdict() for row in rows], "next_offset": offset + limit if has_more else None})
 
 
 @router.patch("/{message_id}", response_model=MessageOut)
@@ -74,5 +131,4 @@ async def delete_message_route(
     if message.author_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot delete another user's message")
 
-    await db.delete(message)
-    await db.commit()
+    await delete_message(db, message)
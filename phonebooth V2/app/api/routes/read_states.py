@@ -0,0 +1,34 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_read_db, require_channel_member
+from app.core.serialization import JSONBytesResponse, rows_response
+from app.db.session import get_db
+from app.models import User
+from app.schemas.read_state import ReadStateOut
+from app.services.read_state_service import ack_message, list_read_states
+
+router = APIRouter(tags=["read-states"])
+
+
+@router.get("/me/read-states", response_model=list[ReadStateOut])
+async def my_read_states(
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+) -> JSONBytesResponse:
+    return rows_response(await list_read_states(db, current_user.id))
+
+
+@router.post("/channels/{channel_id}/messages/{message_id}/ack", status_code=status.HTTP_204_NO_CONTENT)
+async def ack_message_route(
+    channel_id: UUID,
+    message_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Response:
+    await require_channel_member(db, channel_id, current_user.id)
+    if not await ack_message(db, current_user.id, channel_id, message_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,14 +1,23 @@
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, require_server_member, require_server_owner
+from app.api.deps import get_current_user, get_read_db, require_server_member, require_server_owner
+from app.api.routes.deletions import delete_or_schedule
+from app.core.etags import listing_etag, not_modified, tag_response
+from app.core.serialization import JSONBytesResponse, columns_for, rows_response
 from app.db.session import get_db
-from app.models import Server, ServerMember, User
+from app.models import Channel, Server, ServerMember, User
 from app.models.enums import MemberRole
-from app.schemas.server import CreateServerIn, ServerOut
+from app.schemas.channel import ChannelOut
+from app.schemas.deletion import DeletionJobOut
+from app.schemas.message import MessageSearchOut
+from app.schemas.server import CreateServerIn, ServerOut, ServerTreeOut
+from app.services.events import event_bus
+from app.services.search_service import search_messages
 
 router = APIRouter(prefix="/servers", tags=["servers"])
 
@@ -25,46 +34,92 @@ async def create_server(
 
     membership = ServerMember(server_id=server.id, user_id=current_user.id, role=MemberRole.OWNER.value)
     db.add(membership)
+    await db.flush()
+    await db.refresh(server)
 
+    out = ServerOut.model_validate(server, from_attributes=True)
+    event_bus.emit(db, "SERVER_CREATE", out.model_dump(mode="json"), user_id=current_user.id)
     await db.commit()
-    await db.refresh(server)
-    return ServerOut.model_validate(server, from_attributes=True)
+    return out
 
 
-@router.get("", response_model=list[ServerOut])
+@router.get("", response_model=list[ServerOut] | list[ServerTreeOut])
 async def list_servers(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    include: Literal["channels"] | None = Query(default=None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
-) -> list[ServerOut]:
+) -> Response:
     stmt = (
-        select(Server)
+        select(*columns_for(Server, ServerOut))
         .join(ServerMember, ServerMember.server_id == Server.id)
         .where(ServerMember.user_id == current_user.id)
         .order_by(Server.created_at.desc())
     )
-    servers = (await db.execute(stmt)).scalars().all()
-    return [ServerOut.model_validate(server, from_attributes=True) for server in servers]
+    if include is None:
+        # The tree variant is not tagged: it would have to track channel changes in every server of the user.
+        # Listed server rows are never updated, so joins and deletions are the only changes and both move this pair.
+        memberships = select(func.count(), func.max(ServerMember.joined_at)).where(ServerMember.user_id == current_user.id)
+        etag = listing_etag(current_user.id, "servers", *(await db.execute(memberships)).one())
+        if (cached := not_modified(request, etag)) is not None:
+            return cached
+        return tag_response(rows_response(await db.execute(stmt)), etag)
+
+    servers = {row.id: {**row._asdict(), "channels": []} for row in await db.execute(stmt)}
+    # One query for every channel of every server; the membership join is the only authorization pass.
+    channels = (
+        select(*columns_for(Channel, ChannelOut))
+        .join(ServerMember, ServerMember.server_id == Channel.server_id)
+        .where(ServerMember.user_id == current_user.id)
+        .order_by(Channel.position.asc(), Channel.created_at.asc())
+    )
+    for row in await db.execute(channels):
+        if (server := servers.get(row.server_id)) is not None:
+            server["channels"].append(row._asdict())
+    return JSONBytesResponse(list(servers.values()))
 
 
 @router.get("/{server_id}", response_model=ServerOut)
 async def get_server(
     server_id: UUID,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
-) -> ServerOut:
+) -> Response:
     await require_server_member(db, server_id, current_user.id)
-    server = (await db.execute(select(Server).where(Server.id == server_id))).scalar_one_or_none()
+    stmt = select(*columns_for(Server, ServerOut)).where(Server.id == server_id)
+    server = (await db.execute(stmt)).first()
     if server is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Server not found")
-    return ServerOut.model_validate(server, from_attributes=True)
+    etag = listing_etag(current_user.id, "server", server.id, server.created_at)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    return tag_response(JSONBytesResponse(server._asdict()), etag)
 
 
-@router.delete("/{server_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.get("/{server_id}/messages/search", response_model=MessageSearchOut)
+async def search_server_messages(
+    server_id: UUID,
+    q: str = Query(min_length=1, max_length=200, pattern=r"\S"),
+    limit: int = Query(default=25, ge=1, le=100),
+    offset: int = Query(default=0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user),
+) -> JSONBytesResponse:
+    await require_server_member(db, server_id, current_user.id)
+    rows, has_more = await search_messages(db, q, limit, offset, server_id=server_id)
+    return JSONBytesResponse({"items": [row._asdict() for row in rows], "next_offset": offset + limit if has_more else None})
+
+
+@router.delete(
+    "/{server_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={status.HTTP_202_ACCEPTED: {"model": DeletionJobOut}},
+)
 async def delete_server(
     server_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> None:
-    server = await require_server_owner(db, server_id, current_user.id)
-    await db.delete(server)
-    await db.commit()
+) -> Response:
+    await require_server_owner(db, server_id, current_user.id)
+    return await delete_or_schedule(db, "server", server_id, current_user.id)
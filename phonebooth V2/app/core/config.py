@@ -13,11 +13,93 @@ class Settings(BaseSettings):
 
     supabase_url: str
     supabase_db_url: str
+    supabase_db_replica_url: str | None = None
     supabase_jwks_url: str
     supabase_jwt_audience: str = "authenticated"
 
     cors_origins: list[str] = Field(default_factory=lambda: ["http://localhost:3000", "http://localhost:5173"])
     redis_url: str | None = None
+    db_pool_warm_connections: int = 2
+    # Callers who committed within this window read from the primary instead of the replica.
+    db_read_your_writes_seconds: float = 5.0
+
+    metrics_enabled: bool = True
+    slow_query_ms: float = 200.0
+
+    # Worker bits of generated ids; derived from host and pid when unset.
+    id_worker_id: int | None = None
+
+    user_cache_size: int = 10_000
+    user_cache_ttl_seconds: float = 300.0
+
+    message_batching_enabled: bool = False
+    message_batch_window_ms: float = 5.0
+    message_batch_max_size: int = 500
+
+    message_nonce_cache_size: int = 50_000
+    message_nonce_ttl_seconds: float = 600.0
+
+    # The recent-message cache lives in process memory and is only invalidated by writes in the same process.
+    # Only enable it when a single worker serves all message writes; with several, pages can go stale indefinitely.
+    message_cache_enabled: bool = False
+    message_cache_channel_size: int = 100
+    message_cache_max_bytes: int = 64 * 1024 * 1024
+
+    message_archive_dir: str = "archive/messages"
+    # How long a process trusts its listing of archived months; archive runs elsewhere show up after this.
+    message_archive_refresh_seconds: float = 60.0
+
+    attachment_store_dir: str = "data/attachments"
+    attachment_max_bytes: int = 25 * 1024 * 1024
+    attachment_write_buffer_bytes: int = 1024 * 1024
+    # Set when nginx fronts the app with an internal location mapped onto attachment_store_dir.
+    attachment_accel_redirect_prefix: str | None = None
+    message_hot_months: int = 3
+    message_partitions_ahead: int = 2
+
+    gateway_replay_buffer_size: int = 500
+    gateway_resume_window_seconds: float = 60.0
+    # Frames queued for one socket before it is closed as a slow consumer; matching the replay buffer lets it resume.
+    gateway_send_queue_size: int = 500
+    # Ops one connection may have in flight; reading from the socket pauses while all slots are taken.
+    gateway_max_inflight_ops: int = 16
+
+    # op -> (burst, tokens refilled per second)
+    gateway_connection_rate_limits: dict[str, tuple[int, float]] = Field(
+        default_factory=lambda: {
+            "send_message": (10, 5.0),
+            "join_channel": (20, 10.0),
+            "leave_channel": (20, 10.0),
+            "join_server": (10, 2.0),
+            "leave_server": (10, 2.0),
+            "typing_start": (5, 1.0),
+            "presence_update": (5, 0.2),
+            "ack": (10, 2.0),
+        }
+    )
+    gateway_user_rate_limits: dict[str, tuple[int, float]] = Field(
+        default_factory=lambda: {
+            "send_message": (20, 8.0),
+            "join_channel": (50, 20.0),
+            "leave_channel": (50, 20.0),
+            "join_server": (20, 4.0),
+            "leave_server": (20, 4.0),
+            "typing_start": (10, 2.0),
+            "presence_update": (5, 0.2),
+            "ack": (20, 4.0),
+        }
+    )
+    gateway_rate_limit_max_keys: int = 100_000
+
+    bulk_delete_inline_max_messages: int = 10_000
+    bulk_delete_chunk_size: int = 5_000
+    bulk_delete_job_retention_seconds: float = 3600.0
+    # A running job whose heartbeat is older than this is taken over by another worker.
+    bulk_delete_job_lease_seconds: float = 60.0
+
+    typing_timeout_seconds: float = 10.0
+    typing_coalesce_seconds: float = 8.0
+    presence_flush_interval_ms: float = 500.0
 
 
 @lru_cache
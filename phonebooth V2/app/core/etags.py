@@ -0,0 +1,28 @@
+import hashlib
+from uuid import UUID
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def listing_etag(user_id: UUID, *version: object) -> str:
+    # Versions come from the database, so every worker and replica derives the same tag for the same rows.
+    source = "|".join(str(part) for part in (user_id, *version))
+    return f'W/"{hashlib.blake2b(source.encode(), digest_size=12).hexdigest()}"'
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def tag_response(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
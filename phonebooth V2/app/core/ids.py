@@ -0,0 +1,72 @@
+import hashlib
+import os
+import secrets
+import socket
+import threading
+import time
+import uuid
+from datetime import UTC, datetime
+from functools import cached_property
+
+from app.core.config import get_settings
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+RANDOM_BITS = 52
+
+
+def _derived_worker_id() -> int:
+    digest = hashlib.blake2b(f"{socket.gethostname()}:{os.getpid()}".encode(), digest_size=4).digest()
+    return int.from_bytes(digest) & ((1 << WORKER_BITS) - 1)
+
+
+class SnowflakeGenerator:
+    # Snowflake fields in a UUIDv7 layout, so ids still fit the uuid columns and API:
+    # 48-bit unix ms | version 7 | 12-bit per-ms sequence | variant | 10-bit worker | 52 random bits.
+    # Ids sort by creation time; worker bits plus the random tail keep concurrent processes from colliding.
+    def __init__(self) -> None:
+        self.reset()
+
+    @cached_property
+    def worker_id(self) -> int:
+        # Resolved on the first id rather than at import, so the models import without any configuration.
+        worker_id = get_settings().id_worker_id
+        return (worker_id if worker_id is not None else _derived_worker_id()) & ((1 << WORKER_BITS) - 1)
+
+    def reset(self) -> None:
+        self.__dict__.pop("worker_id", None)
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def next_id(self) -> uuid.UUID:
+        with self._lock:
+            now = time.time_ns() // 1_000_000
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting on the last timestamp.
+                self._sequence += 1
+                if self._sequence >> SEQUENCE_BITS:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+            timestamp, sequence = self._last_ms, self._sequence
+        value = (
+            timestamp << 80
+            | 0x7 << 76
+            | sequence << 64
+            | 0b10 << 62
+            | self.worker_id << RANDOM_BITS
+            | secrets.randbits(RANDOM_BITS)
+        )
+        return uuid.UUID(int=value)
+
+
+def id_timestamp(value: uuid.UUID) -> datetime | None:
+    if value.version != 7:
+        return None
+    return datetime.fromtimestamp((value.int >> 80) / 1000, UTC)
+
+
+id_generator = SnowflakeGenerator()
+# Workers forked from a preloaded app would otherwise share the worker id and sequence state.
+os.register_at_fork(after_in_child=id_generator.reset)
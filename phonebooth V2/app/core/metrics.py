@@ -0,0 +1,163 @@
+import bisect
+import logging
+import time
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+logger = logging.getLogger("app.sql")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250, 1000)
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[str, Labels, float]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.types: dict[str, tuple[str, str]] = {}
+        self.counters: dict[tuple[str, Labels], float] = {}
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.collectors: list[Callable[[], Iterable[Sample]]] = []
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        self.types[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def render(self) -> str:
+        samples: dict[str, list[str]] = {}
+        for (name, labels), value in self.counters.items():
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value:g}")
+        for (name, labels), histogram in self.histograms.items():
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts, strict=True):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for collect in self.collectors:
+            for name, labels, value in collect():
+                samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value:g}")
+
+        out = []
+        for name, lines in samples.items():
+            if name in self.types:
+                kind, help_text = self.types[name]
+                out += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            out += lines
+        return "\n".join(out) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("http_request_duration_seconds", "histogram", "HTTP request latency by route template")
+metrics.describe("http_request_db_statements", "histogram", "SQL statements executed per HTTP request")
+metrics.describe("http_request_db_seconds", "histogram", "Time spent in SQL per HTTP request")
+metrics.describe("db_query_duration_seconds", "histogram", "Latency of individual SQL statements")
+metrics.describe("db_slow_queries_total", "counter", "SQL statements slower than slow_query_ms")
+
+
+@dataclass(slots=True)
+class QueryStats:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    # Kept on the execution context rather than a per-connection stack, so a statement that raises leaves nothing behind.
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    elapsed = time.perf_counter() - context._query_started
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+    metrics.observe("db_query_duration_seconds", elapsed)
+    if elapsed * 1000 >= get_settings().slow_query_ms:
+        metrics.inc("db_slow_queries_total")
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_stats.reset(token)
+            route = scope.get("route")
+            # Label by route template, never the raw path, so IDs do not explode label cardinality.
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            metrics.observe("http_request_duration_seconds", elapsed, status=str(status_code), **labels)
+            metrics.observe("http_request_db_statements", stats.statements, COUNT_BUCKETS, **labels)
+            metrics.observe("http_request_db_seconds", stats.seconds, **labels)
@@ -9,10 +9,16 @@ from jose import jwt
 
 from app.core.config import get_settings
 
-settings = get_settings()
-
 _jwks_cache: dict[str, Any] | None = None
 _jwks_cache_expiry: datetime | None = None
+_http_client: httpx.AsyncClient | None = None
+
+
+def _client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=10.0)
+    return _http_client
 
 
 async def _get_jwks() -> dict[str, Any]:
@@ -22,16 +28,31 @@ async def _get_jwks() -> dict[str, Any]:
     if _jwks_cache and _jwks_cache_expiry and now < _jwks_cache_expiry:
         return _jwks_cache
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(settings.supabase_jwks_url)
-        response.raise_for_status()
-        data = response.json()
+    response = await _client().get(get_settings().supabase_jwks_url)
+    response.raise_for_status()
+    data = response.json()
 
     _jwks_cache = data
     _jwks_cache_expiry = now + timedelta(minutes=30)
     return data
 
 
+async def warm_jwks() -> bool:
+    # A JWKS outage must not block startup; verification fetches the keys again on first use.
+    try:
+        await _get_jwks()
+    except httpx.HTTPError:
+        return False
+    return True
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 async def verify_supabase_jwt(token: str) -> dict[str, Any]:
     try:
         unverified_header = jwt.get_unverified_header(token)
@@ -46,6 +67,7 @@ async def verify_supabase_jwt(token: str) -> dict[str, Any]:
     if not matching_key:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No matching public key")
 
+    settings = get_settings()
     try:
         payload = jwt.decode(
             token,
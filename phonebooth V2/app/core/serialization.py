@@ -0,0 +1,32 @@
+from collections.abc import Iterable
+from typing import Any
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def columns_for(model: type, schema: type[BaseModel]) -> list[InstrumentedAttribute]:
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def dump_row(row: Any, schema: type[BaseModel]) -> dict[str, Any]:
+    return {name: getattr(row, name) for name in schema.model_fields}
+
+
+def encode_json(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return encode_json(content)
+
+
+def rows_response(rows: Iterable[Any]) -> JSONBytesResponse:
+    return JSONBytesResponse([row._asdict() for row in rows])
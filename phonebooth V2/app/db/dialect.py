@@ -0,0 +1,9 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def insert_for(db: AsyncSession):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return pg_insert
@@ -1,13 +1,17 @@
 import asyncio
 
+from app.core.config import get_settings
 from app.db.base import Base
-from app.db.session import engine
-from app.models import Channel, Message, Server, ServerMember, User
+from app.db.partitions import ensure_partitions
+from app.db.session import get_engine
+from app.models import Channel, Message, ReadState, Server, ServerMember, User
 
 
 async def init_db() -> None:
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        if conn.dialect.name == "postgresql":
+            await ensure_partitions(conn, get_settings().message_partitions_ahead)
 
 
 if __name__ == "__main__":
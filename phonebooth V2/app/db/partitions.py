@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+from datetime import UTC, date, datetime
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import get_settings
+from app.core.serialization import columns_for
+from app.db.session import dispose_engine, get_engine
+from app.models import Message, MessageNonce
+from app.schemas.message import MessageOut
+from app.services.message_archive import ArchivedMessage, MonthWriter, message_archive
+
+
+def _month_start(value: date, offset: int = 0) -> date:
+    index = value.year * 12 + value.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month: date) -> str:
+    return f"messages_p{month:%Y%m}"
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: int) -> list[str]:
+    await conn.execute(text("create table if not exists messages_default partition of messages default"))
+    created = []
+    this_month = _month_start(datetime.now(UTC).date())
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(this_month, offset), _month_start(this_month, offset + 1)
+        name = _partition_name(start)
+        created.append(name)
+        if (await conn.execute(text("select to_regclass(:name)"), {"name": name})).scalar():
+            continue
+        bounds = f"from ('{start}') to ('{end}')"
+        in_default = f"created_at >= '{start}' and created_at < '{end}'"
+        if not (await conn.execute(text(f"select exists (select 1 from messages_default where {in_default})"))).scalar():
+            await conn.execute(text(f"create table {name} partition of messages for values {bounds}"))
+            continue
+        # Postgres refuses a partition whose range already has rows in the default partition, so those rows
+        # move into a standalone table first, which is then attached in the same transaction.
+        await conn.execute(text(f"create table {name} (like messages including defaults including constraints)"))
+        await conn.execute(
+            text(f"with moved as (delete from messages_default where {in_default} returning *) insert into {name} select * from moved")
+        )
+        await conn.execute(text(f"alter table messages attach partition {name} for values {bounds}"))
+    return created
+
+
+async def archive_before(engine: AsyncEngine, cutoff: date) -> dict[str, int]:
+    archived: dict[str, int] = {}
+    async with engine.connect() as conn:
+        oldest = (await conn.execute(select(Message.created_at).order_by(Message.created_at.asc()).limit(1))).scalar()
+    if oldest is None:
+        return archived
+
+    month = _month_start(oldest.date())
+    while month < cutoff:
+        # One transaction per month. Files are renamed into place only after that month's rows are deleted, so a
+        # failed run leaves rows in the hot table and stray .partial files, never messages in both places.
+        end = _month_start(month, 1)
+        writer = message_archive.open_month(f"{month:%Y_%m}")
+        try:
+            async with engine.begin() as conn:
+                await _archive_month(conn, writer, month, end)
+        except BaseException:
+            writer.discard()
+            raise
+        message_archive.publish(writer)
+        if writer.count:
+            archived[f"{month:%Y_%m}"] = writer.count
+        month = end
+    return archived
+
+
+async def _archive_month(conn: AsyncConnection, writer: MonthWriter, month: date, end: date) -> None:
+    bounds = (Message.created_at >= month, Message.created_at < end)
+    stmt = (
+        select(*columns_for(Message, MessageOut))
+        .where(*bounds)
+        .order_by(Message.channel_id, Message.created_at.desc(), Message.id.desc())
+    )
+    async for row in await conn.stream(stmt):
+        writer.write(ArchivedMessage(*row))
+    writer.close()
+
+    name = _partition_name(month)
+    if conn.dialect.name == "postgresql" and (await conn.execute(text("select to_regclass(:name)"), {"name": name})).scalar():
+        await conn.execute(text(f"alter table messages detach partition {name}"))
+        await conn.execute(text(f"drop table {name}"))
+    await conn.execute(delete(Message).where(*bounds))
+    await conn.execute(delete(MessageNonce).where(MessageNonce.message_created_at < end))
+
+
+async def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Maintain monthly message partitions and the cold archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ensure = commands.add_parser("ensure", help="create partitions up to N months ahead")
+    ensure.add_argument("--months-ahead", type=int, default=settings.message_partitions_ahead)
+    archive = commands.add_parser("archive", help="move months older than the hot window into the archive")
+    archive.add_argument("--hot-months", type=int, default=settings.message_hot_months)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if args.command == "ensure":
+        if engine.dialect.name != "postgresql":
+            raise SystemExit("Partitions are only supported on Postgres")
+        async with engine.begin() as conn:
+            for name in await ensure_partitions(conn, args.months_ahead):
+                print(name)
+    else:
+        cutoff = _month_start(datetime.now(UTC).date(), -args.hot_months + 1)
+        for month, count in (await archive_before(engine, cutoff)).items():
+            print(f"{month}: {count} messages archived")
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,119 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import asyncio
+import time
+from functools import cached_property
+from uuid import UUID
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
 
-settings = get_settings()
+_engine: AsyncEngine | None = None
+_replica_engine: AsyncEngine | None = None
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(url, pool_pre_ping=True)
+    if engine.dialect.name == "sqlite":
+        # SQLite ignores foreign keys unless asked per connection; the ON DELETE CASCADEs rely on them.
+        event.listen(engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return engine
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = _create_engine(get_settings().supabase_db_url)
+    return _engine
+
+
+def get_replica_engine() -> AsyncEngine | None:
+    global _replica_engine
+    url = get_settings().supabase_db_replica_url
+    if _replica_engine is None and url:
+        _replica_engine = _create_engine(url)
+    return _replica_engine
+
+
+class RecentWriters:
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._until: dict[UUID, float] = {}
+
+    @cached_property
+    def window(self) -> float:
+        return get_settings().db_read_your_writes_seconds
+
+    def mark(self, user_id: UUID) -> None:
+        now = time.monotonic()
+        if len(self._until) >= self.max_users:
+            self._until = {key: until for key, until in self._until.items() if until > now}
+        self._until[user_id] = now + self.window
+
+    def active(self, user_id: UUID) -> bool:
+        until = self._until.get(user_id)
+        return until is not None and until > time.monotonic()
+
+
+recent_writers = RecentWriters(max_users=100_000)
+
 
-engine = create_async_engine(settings.supabase_db_url, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+class PrimarySession(Session):
+    pass
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _mark_writers(session: Session) -> None:
+    for user_id in session.info.get("writers", ()):
+        recent_writers.mark(user_id)
+
+
+class _LazyEngineSession(AsyncSession):
+    def __init__(self, bind: AsyncEngine | None = None, **kw) -> None:
+        super().__init__(bind=bind or get_engine(), **kw)
+
+
+class _LazyReplicaSession(AsyncSession):
+    def __init__(self, bind: AsyncEngine | None = None, **kw) -> None:
+        super().__init__(bind=bind or get_replica_engine(), **kw)
+
+
+# Binding happens per session, so importing this module never creates the engine or loads the DB driver.
+AsyncSessionLocal = async_sessionmaker(
+    class_=_LazyEngineSession, sync_session_class=PrimarySession, expire_on_commit=False
+)
+ReplicaSessionLocal = async_sessionmaker(class_=_LazyReplicaSession, expire_on_commit=False)
+
+
+def mark_writer(db: AsyncSession, user_id: UUID) -> None:
+    db.info.setdefault("writers", set()).add(user_id)
 
 
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def warm_pool(connections: int) -> None:
+    engines = [engine for engine in (get_engine(), get_replica_engine()) if engine is not None]
+
+    async def _connect(engine: AsyncEngine) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("select 1"))
+
+    await asyncio.gather(*(_connect(engine) for engine in engines for _ in range(connections)))
+
+
+async def dispose_engine() -> None:
+    global _engine, _replica_engine
+    for engine in (_engine, _replica_engine):
+        if engine is not None:
+            await engine.dispose()
+    _engine = _replica_engine = None
@@ -1,12 +1,39 @@
-from fastapi import FastAPI
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.api.routes import auth, channels, messages, servers
+from app.api.routes import attachments, auth, channels, deletions, messages, read_states, servers
 from app.core.config import get_settings
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.security import close_http_client, warm_jwks
+from app.db.session import dispose_engine, warm_pool
+from app.services.deletion_service import bulk_deleter
+from app.services.events import event_bus
+from app.services.message_pipeline import message_pipeline
 from app.websocket.gateway import router as gateway_router
 
 settings = get_settings()
-app = FastAPI(title=settings.app_name)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    await asyncio.gather(warm_pool(settings.db_pool_warm_connections), warm_jwks())
+    await bulk_deleter.resume()
+    yield
+    await message_pipeline.close()
+    await bulk_deleter.close()
+    await event_bus.close()
+    await close_http_client()
+    await dispose_engine()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,8 +49,18 @@ async def health() -> dict[str, str]:
     return {"status": "ok", "env": settings.app_env}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(auth.router, prefix=settings.api_prefix)
 app.include_router(servers.router, prefix=settings.api_prefix)
 app.include_router(channels.router, prefix=settings.api_prefix)
 app.include_router(messages.router, prefix=settings.api_prefix)
+app.include_router(attachments.router, prefix=settings.api_prefix)
+app.include_router(read_states.router, prefix=settings.api_prefix)
+app.include_router(deletions.router, prefix=settings.api_prefix)
 app.include_router(gateway_router)
@@ -1,6 +1,9 @@
+from app.models.attachment import Attachment
 from app.models.channel import Channel
-from app.models.message import Message
+from app.models.deletion_job import DeletionJob
+from app.models.message import Message, MessageNonce
+from app.models.read_state import ReadState
 from app.models.server import Server, ServerMember
 from app.models.user import User
 
-__all__ = ["User", "Server", "ServerMember", "Channel", "Message"]
+__all__ = ["User", "Server", "ServerMember", "Channel", "Message", "MessageNonce", "ReadState", "Attachment", "DeletionJob"]
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,6 +18,9 @@ class Channel(Base):
     channel_type: Mapped[str] = mapped_column(String(20), default=ChannelType.TEXT.value)
     position: Mapped[int] = mapped_column(Integer, default=0)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_message_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    last_message_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    message_count: Mapped[int] = mapped_column(BigInteger, default=0, server_default="0")
 
     server = relationship("Server", back_populates="channels")
-    messages = relationship("Message", back_populates="channel", cascade="all, delete-orphan")
+    messages = relationship("Message", back_populates="channel", cascade="all, delete-orphan", passive_deletes=True)
@@ -1,22 +1,72 @@
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, ForeignKey, Text, func
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, String, Text, event, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.ids import id_generator, id_timestamp
 from app.db.base import Base
 
 
+def _created_at(context) -> datetime:
+    # The id's embedded timestamp, so (created_at, id) order and id order agree.
+    return id_timestamp(context.get_current_parameters()["id"]) or datetime.now(UTC)
+
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    channel_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("channels.id", ondelete="CASCADE"), index=True)
+    # Time-ordered, so inserts append to the right edge of the primary key and channel indexes.
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=id_generator.next_id)
+    channel_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("channels.id", ondelete="CASCADE"))
     author_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True)
     content: Mapped[str] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Part of the primary key because Postgres requires the partition key in every unique constraint.
+    # Stamped in Python as well so the ORM knows the full identity without reading back the server default.
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, default=_created_at, server_default=func.now()
+    )
     edited_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     channel = relationship("Channel", back_populates="messages")
     author = relationship("User", back_populates="messages")
+
+
+class MessageNonce(Base):
+    # Retry dedup backstop. A separate table because a unique constraint on the partitioned messages table
+    # would have to include created_at, which a retry does not share with the original.
+    __tablename__ = "message_nonces"
+
+    author_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    channel_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("channels.id", ondelete="CASCADE"), primary_key=True
+    )
+    nonce: Mapped[str] = mapped_column(String(64), primary_key=True)
+    message_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True))
+    message_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+Index("idx_messages_channel_created_id", Message.channel_id, Message.created_at.desc(), Message.id.desc())
+Index("idx_message_nonces_message_created_at", MessageNonce.message_created_at)
+
+# Expression index instead of a stored tsvector column; queries must build the exact same expression to use it.
+message_search_document = func.to_tsvector(text("'simple'::regconfig"), Message.content)
+Index("idx_messages_content_fts", message_search_document, postgresql_using="gin").ddl_if(dialect="postgresql")
+
+# SQLite stand-in for local runs: an external-content FTS5 table kept in sync by triggers.
+for statement in (
+    "CREATE VIRTUAL TABLE messages_fts USING fts5(content, content='messages', content_rowid='rowid')",
+    """CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END""",
+    """CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END""",
+    """CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END""",
+):
+    event.listen(Message.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
@@ -18,8 +18,8 @@ class Server(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     owner = relationship("User", back_populates="owned_servers")
-    members = relationship("ServerMember", back_populates="server", cascade="all, delete-orphan")
-    channels = relationship("Channel", back_populates="server", cascade="all, delete-orphan")
+    members = relationship("ServerMember", back_populates="server", cascade="all, delete-orphan", passive_deletes=True)
+    channels = relationship("Channel", back_populates="server", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class ServerMember(Base):
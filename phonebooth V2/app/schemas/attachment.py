@@ -0,0 +1,16 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class AttachmentOut(BaseModel):
+    id: UUID
+    message_id: UUID
+    channel_id: UUID
+    uploader_id: UUID
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    created_at: datetime
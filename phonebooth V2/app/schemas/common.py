@@ -13,4 +13,5 @@ class UserOut(BaseModel):
 
 class PaginationParams(BaseModel):
     limit: int = 50
-    before: datetime | None = None
+    before: str | None = None
+    after: str | None = None
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class DeletionJobOut(BaseModel):
+    id: UUID
+    kind: Literal["server", "channel"]
+    target_id: UUID
+    status: Literal["pending", "running", "done", "failed"]
+    total_messages: int
+    deleted_messages: int
+    error: str | None
+    created_at: datetime
+    finished_at: datetime | None
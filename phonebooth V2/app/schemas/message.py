@@ -6,6 +6,7 @@ from pydantic import BaseModel, Field
 
 class CreateMessageIn(BaseModel):
     content: str = Field(min_length=1, max_length=4000)
+    nonce: str | None = Field(default=None, min_length=1, max_length=64)
 
 
 class UpdateMessageIn(BaseModel):
@@ -19,3 +20,14 @@ class MessageOut(BaseModel):
     content: str
     created_at: datetime
     edited_at: datetime | None
+
+
+class MessagePageOut(BaseModel):
+    items: list[MessageOut]
+    before: str | None
+    after: str | None
+
+
+class MessageSearchOut(BaseModel):
+    items: list[MessageOut]
+    next_offset: int | None
@@ -0,0 +1,11 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class ReadStateOut(BaseModel):
+    channel_id: UUID
+    server_id: UUID
+    last_message_id: UUID | None
+    last_read_message_id: UUID | None
+    unread_count: int
@@ -3,6 +3,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+from app.schemas.channel import ChannelOut
+
 
 class CreateServerIn(BaseModel):
     name: str = Field(min_length=2, max_length=100)
@@ -15,6 +17,10 @@ class ServerOut(BaseModel):
     created_at: datetime
 
 
+class ServerTreeOut(ServerOut):
+    channels: list[ChannelOut]
+
+
 class ServerMemberOut(BaseModel):
     user_id: UUID
     role: str
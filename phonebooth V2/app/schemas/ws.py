@@ -1,11 +1,82 @@
-from typing import Any
+from typing import Annotated, Any, Literal
+from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter
 
 
-class GatewayEventIn(BaseModel):
-    op: str
-    d: dict[str, Any]
+class ChannelRef(BaseModel):
+    channel_id: UUID
+
+
+class ServerRef(BaseModel):
+    server_id: UUID
+
+
+class SendMessageData(BaseModel):
+    channel_id: UUID
+    content: str = Field(min_length=1, max_length=4000)
+    nonce: str | None = Field(default=None, min_length=1, max_length=64)
+
+
+class AckData(BaseModel):
+    channel_id: UUID
+    message_id: UUID
+
+
+class PresenceData(BaseModel):
+    status: Literal["online", "idle", "dnd", "invisible"]
+
+
+class GatewayOp(BaseModel):
+    # Opaque client reference echoed on the op's replies, so pipelined ops can be matched to their results.
+    ref: str | None = Field(default=None, max_length=64)
+
+
+class JoinChannelOp(GatewayOp):
+    op: Literal["join_channel"]
+    d: ChannelRef
+
+
+class LeaveChannelOp(GatewayOp):
+    op: Literal["leave_channel"]
+    d: ChannelRef
+
+
+class JoinServerOp(GatewayOp):
+    op: Literal["join_server"]
+    d: ServerRef
+
+
+class LeaveServerOp(GatewayOp):
+    op: Literal["leave_server"]
+    d: ServerRef
+
+
+class SendMessageOp(GatewayOp):
+    op: Literal["send_message"]
+    d: SendMessageData
+
+
+class TypingStartOp(GatewayOp):
+    op: Literal["typing_start"]
+    d: ChannelRef
+
+
+class PresenceUpdateOp(GatewayOp):
+    op: Literal["presence_update"]
+    d: PresenceData
+
+
+class AckOp(GatewayOp):
+    op: Literal["ack"]
+    d: AckData
+
+
+GatewayOpIn = Annotated[
+    JoinChannelOp | LeaveChannelOp | JoinServerOp | LeaveServerOp | SendMessageOp | TypingStartOp | PresenceUpdateOp | AckOp,
+    Field(discriminator="op"),
+]
+gateway_op_adapter: TypeAdapter[GatewayOpIn] = TypeAdapter(GatewayOpIn)
 
 
 class GatewayEventOut(BaseModel):
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi import Response
+from fastapi.responses import FileResponse
+
+from app.core.config import get_settings
+
+# Blobs are immutable under their hash, so clients may keep them indefinitely.
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+
+class AttachmentTooLarge(ValueError):
+    pass
+
+
+@dataclass(slots=True)
+class StoredBlob:
+    sha256: str
+    size: int
+
+
+class AttachmentStore(ABC):
+    @abstractmethod
+    async def put(self, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredBlob: ...
+
+    @abstractmethod
+    def response(self, sha256: str, filename: str, content_type: str) -> Response: ...
+
+
+class LocalAttachmentStore(AttachmentStore):
+    @cached_property
+    def root(self) -> Path:
+        return Path(get_settings().attachment_store_dir)
+
+    @cached_property
+    def write_buffer(self) -> int:
+        return get_settings().attachment_write_buffer_bytes
+
+    @cached_property
+    def accel_redirect_prefix(self) -> str | None:
+        return get_settings().attachment_accel_redirect_prefix
+
+    def relative_path(self, sha256: str) -> str:
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+    def path(self, sha256: str) -> Path:
+        return self.root / self.relative_path(sha256)
+
+    async def put(self, chunks: AsyncIterator[bytes], max_bytes: int) -> StoredBlob:
+        # Hashed while streaming to a temp file; memory holds at most one write buffer of the body.
+        partial = self.root / "tmp" / f"{uuid.uuid4().hex}.partial"
+        await asyncio.to_thread(partial.parent.mkdir, parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        handle = await asyncio.to_thread(open, partial, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLarge(f"Attachment exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                buffer += chunk
+                if len(buffer) >= self.write_buffer:
+                    await asyncio.to_thread(handle.write, bytes(buffer))
+                    buffer.clear()
+            await asyncio.to_thread(handle.write, bytes(buffer))
+        except BaseException:
+            handle.close()
+            partial.unlink(missing_ok=True)
+            raise
+        await asyncio.to_thread(handle.close)
+
+        sha256 = digest.hexdigest()
+        await asyncio.to_thread(self._commit, partial, self.path(sha256))
+        return StoredBlob(sha256=sha256, size=size)
+
+    def _commit(self, partial: Path, target: Path) -> None:
+        if target.exists():
+            partial.unlink()
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial, target)
+
+    def response(self, sha256: str, filename: str, content_type: str) -> Response:
+        headers = {"Cache-Control": IMMUTABLE, "X-Content-Type-Options": "nosniff"}
+        if self.accel_redirect_prefix is not None:
+            # nginx serves the blob itself with sendfile and range support; the app only authorizes.
+            headers["Content-Disposition"] = _content_disposition(filename)
+            headers["X-Accel-Redirect"] = f"{self.accel_redirect_prefix.rstrip('/')}/{self.relative_path(sha256)}"
+            return Response(headers=headers, media_type=content_type)
+        # FileResponse answers Range requests and hands the path to the server through pathsend when supported.
+        return FileResponse(self.path(sha256), media_type=content_type, filename=filename, headers=headers)
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename*=utf-8''{quoted}"
+
+
+attachment_store: AttachmentStore = LocalAttachmentStore()
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from functools import cached_property
+from typing import Literal
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, delete, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models import Channel, DeletionJob, Message, Server
+from app.services.events import event_bus
+from app.services.message_cache import message_cache
+
+DeletionKind = Literal["server", "channel"]
+ACTIVE_STATUSES = ("pending", "running")
+
+
+async def pending_message_count(db: AsyncSession, kind: DeletionKind, target_id: UUID) -> int:
+    column = Channel.server_id if kind == "server" else Channel.id
+    return await db.scalar(select(func.coalesce(func.sum(Channel.message_count), 0)).where(column == target_id)) or 0
+
+
+async def _channel_ids(db: AsyncSession, kind: DeletionKind, target_id: UUID) -> list[UUID]:
+    if kind == "channel":
+        return [target_id]
+    return list((await db.scalars(select(Channel.id).where(Channel.server_id == target_id))).all())
+
+
+async def delete_now(db: AsyncSession, kind: DeletionKind, target_id: UUID) -> None:
+    # ON DELETE CASCADE removes channels, members, messages and read states inside the database.
+    channel_ids = await _channel_ids(db, kind, target_id)
+    if kind == "server":
+        await db.execute(delete(Server).where(Server.id == target_id))
+        event_bus.emit(db, "SERVER_DELETE", {"id": str(target_id)}, server_id=target_id)
+    else:
+        stmt = delete(Channel).where(Channel.id == target_id).returning(Channel.server_id)
+        server_id = (await db.execute(stmt)).scalar_one_or_none()
+        if server_id is not None:
+            data = {"id": str(target_id), "server_id": str(server_id)}
+            event_bus.emit(db, "CHANNEL_DELETE", data, server_id=server_id)
+    await db.commit()
+    for channel_id in channel_ids:
+        message_cache.drop(channel_id)
+
+
+class BulkDeleter:
+    # Jobs live in deletion_jobs so every worker can report them. Each process only runs the tasks it started, and
+    # claims jobs whose owner stopped heartbeating (crash, kill -9) when it starts or when one is requested again.
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self._tasks: set[asyncio.Task] = set()
+
+    @cached_property
+    def chunk_size(self) -> int:
+        return get_settings().bulk_delete_chunk_size
+
+    @cached_property
+    def retention(self) -> float:
+        return get_settings().bulk_delete_job_retention_seconds
+
+    @cached_property
+    def lease(self) -> float:
+        return get_settings().bulk_delete_job_lease_seconds
+
+    async def schedule(
+        self, db: AsyncSession, kind: DeletionKind, target_id: UUID, requested_by: UUID, total_messages: int
+    ) -> DeletionJob:
+        await self._prune(db)
+        if await self._claim(db, DeletionJob.target_id == target_id):
+            return await self._active_job(db, target_id)
+        job = await self._active_job(db, target_id)
+        if job is not None:
+            return job
+
+        job = DeletionJob(kind=kind, target_id=target_id, requested_by=requested_by, total_messages=total_messages)
+        db.add(job)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another worker scheduled the same target first.
+            await db.rollback()
+            return await self._active_job(db, target_id)
+        self._start(job.id)
+        return job
+
+    async def get(self, db: AsyncSession, job_id: UUID) -> DeletionJob | None:
+        return await db.get(DeletionJob, job_id)
+
+    async def resume(self) -> None:
+        async with self.session_factory() as db:
+            await self._claim(db)
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _start(self, job_id: UUID) -> None:
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _active_job(self, db: AsyncSession, target_id: UUID) -> DeletionJob | None:
+        stmt = select(DeletionJob).where(DeletionJob.target_id == target_id, DeletionJob.status.in_(ACTIVE_STATUSES))
+        return await db.scalar(stmt)
+
+    async def _claim(self, db: AsyncSession, *criteria: ColumnElement[bool]) -> list[UUID]:
+        # The conditional update is the claim: of several workers racing for a stale job, only one sees its row match.
+        now = datetime.now(UTC)
+        stmt = (
+            update(DeletionJob)
+            .where(
+                DeletionJob.status.in_(ACTIVE_STATUSES),
+                DeletionJob.heartbeat_at < now - timedelta(seconds=self.lease),
+                *criteria,
+            )
+            .values(heartbeat_at=now)
+            .returning(DeletionJob.id)
+        )
+        job_ids = list((await db.scalars(stmt)).all())
+        await db.commit()
+        for job_id in job_ids:
+            self._start(job_id)
+        return job_ids
+
+    async def _prune(self, db: AsyncSession) -> None:
+        cutoff = datetime.now(UTC) - timedelta(seconds=self.retention)
+        await db.execute(delete(DeletionJob).where(DeletionJob.finished_at < cutoff))
+
+    async def _run(self, job_id: UUID) -> None:
+        try:
+            async with self.session_factory() as db:
+                job = await db.get(DeletionJob, job_id)
+                job.status = "running"
+                job.heartbeat_at = datetime.now(UTC)
+                await db.commit()
+                for channel_id in await _channel_ids(db, job.kind, job.target_id):
+                    await self._delete_messages(db, job, channel_id)
+                await delete_now(db, job.kind, job.target_id)
+        except Exception as exc:  # noqa: BLE001
+            await self._finish(job_id, "failed", str(exc))
+        except BaseException:
+            # Cancellation (shutdown) must end the job too, or it would stay unfinished and block new requests.
+            await self._finish(job_id, "failed", "Interrupted before finishing")
+            raise
+        else:
+            await self._finish(job_id, "done")
+
+    async def _finish(self, job_id: UUID, status: str, error: str | None = None) -> None:
+        async with self.session_factory() as db:
+            values = {"status": status, "error": error, "finished_at": datetime.now(UTC)}
+            await db.execute(update(DeletionJob).where(DeletionJob.id == job_id).values(**values))
+            await db.commit()
+
+    async def _delete_messages(self, db: AsyncSession, job: DeletionJob, channel_id: UUID) -> None:
+        # Short transactions per chunk keep locks and WAL bursts small and let other requests interleave.
+        while True:
+            chunk = (
+                select(Message.id, Message.created_at)
+                .where(Message.channel_id == channel_id)
+                .limit(self.chunk_size)
+            )
+            result = await db.execute(delete(Message).where(tuple_(Message.id, Message.created_at).in_(chunk)))
+            job.deleted_messages += result.rowcount
+            job.heartbeat_at = datetime.now(UTC)
+            await db.commit()
+            if result.rowcount < self.chunk_size:
+                return
+            await asyncio.sleep(0)
+
+
+bulk_deleter = BulkDeleter(AsyncSessionLocal)
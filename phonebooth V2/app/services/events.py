@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.session import PrimarySession
+
+logger = logging.getLogger("app.events")
+
+
+@dataclass(slots=True)
+class DomainEvent:
+    type: str
+    data: dict[str, Any]
+    channel_id: UUID | None = None
+    server_id: UUID | None = None
+    user_id: UUID | None = None
+
+
+EventHandler = Callable[[list[DomainEvent]], Awaitable[None]]
+
+
+class EventBus:
+    def __init__(self) -> None:
+        self.handlers: list[EventHandler] = []
+        self._queue: asyncio.Queue[list[DomainEvent]] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+
+    def emit(
+        self,
+        db: AsyncSession,
+        event_type: str,
+        data: dict[str, Any],
+        *,
+        channel_id: UUID | None = None,
+        server_id: UUID | None = None,
+        user_id: UUID | None = None,
+    ) -> None:
+        # Held on the session until commit; a rollback discards them, so clients never see uncommitted state.
+        event = DomainEvent(event_type, data, channel_id=channel_id, server_id=server_id, user_id=user_id)
+        db.info.setdefault("events", []).append(event)
+
+    def publish(self, events: list[DomainEvent]) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        self._queue.put_nowait(events)
+
+    async def close(self) -> None:
+        if self._worker is None:
+            return
+        if not self._worker.done():
+            await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self) -> None:
+        # One worker keeps transactions in commit order, so per-channel event order matches the database.
+        # Handlers must not wait on clients: the gateway only queues frames here and sockets drain on their own tasks.
+        while True:
+            events = await self._queue.get()
+            for handler in self.handlers:
+                try:
+                    await handler(events)
+                except Exception:
+                    logger.exception("Event handler %r failed", handler)
+            self._queue.task_done()
+            # get() does not yield while the queue is non-empty; let the socket writers run between commits.
+            await asyncio.sleep(0)
+
+
+event_bus = EventBus()
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _publish_committed(session: Session) -> None:
+    events = session.info.pop("events", None)
+    if events:
+        event_bus.publish(events)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop("events", None)
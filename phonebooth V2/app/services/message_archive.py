@@ -0,0 +1,179 @@
+import asyncio
+import gzip
+import heapq
+import os
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from functools import cached_property
+from itertools import takewhile
+from pathlib import Path
+from typing import NamedTuple
+from uuid import UUID
+
+import orjson
+
+from app.core.config import get_settings
+from app.core.serialization import encode_json
+from app.services.pagination import MessageCursor
+
+
+class ArchivedMessage(NamedTuple):
+    id: UUID
+    channel_id: UUID
+    author_id: UUID
+    content: str
+    created_at: datetime
+    edited_at: datetime | None
+
+
+def _parse(line: bytes) -> ArchivedMessage:
+    raw = orjson.loads(line)
+    return ArchivedMessage(
+        id=UUID(raw["id"]),
+        channel_id=UUID(raw["channel_id"]),
+        author_id=UUID(raw["author_id"]),
+        content=raw["content"],
+        created_at=datetime.fromisoformat(raw["created_at"]),
+        edited_at=datetime.fromisoformat(raw["edited_at"]) if raw["edited_at"] else None,
+    )
+
+
+def _key(message: ArchivedMessage) -> MessageCursor:
+    return message.created_at, message.id
+
+
+def _read_file(path: Path) -> Iterator[ArchivedMessage]:
+    with gzip.open(path, "rb") as handle:
+        for line in handle:
+            yield _parse(line)
+
+
+class MonthWriter:
+    # Expects rows ordered by channel, then newest first, so each channel file is written in one streaming pass.
+    # Files stay .partial until publish(), which the caller runs once the rows are gone from the hot table.
+    # Every run writes its own file per channel, so archiving a month again never replaces rows archived earlier.
+    def __init__(self, directory: Path, run: str) -> None:
+        self.directory = directory
+        self.run = run
+        self.count = 0
+        self._channel_id: UUID | None = None
+        self._handle: gzip.GzipFile | None = None
+        self._partials: dict[UUID, Path] = {}
+
+    def write(self, message: ArchivedMessage) -> None:
+        if message.channel_id != self._channel_id:
+            self._finish_channel()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._channel_id = message.channel_id
+            self._partials[message.channel_id] = self.directory / f"{message.channel_id}.{self.run}.partial"
+            self._handle = gzip.open(self._partials[message.channel_id], "wb")
+        self._handle.write(encode_json(message._asdict()) + b"\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._finish_channel()
+
+    def publish(self) -> None:
+        for channel_id, partial in self._partials.items():
+            os.replace(partial, self.directory / f"{channel_id}.{self.run}.jsonl.gz")
+        self._partials.clear()
+
+    def discard(self) -> None:
+        self._finish_channel()
+        for partial in self._partials.values():
+            partial.unlink(missing_ok=True)
+        self._partials.clear()
+
+    def _finish_channel(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.close()
+        self._handle = None
+
+
+# Cold storage for rolled-off partitions: gzip JSON-lines files per (month, channel, archive run), newest first.
+class MessageArchive:
+    def __init__(self) -> None:
+        self._months: list[str] | None = None
+        self._months_loaded_at = 0.0
+
+    @cached_property
+    def root(self) -> Path:
+        return Path(get_settings().message_archive_dir)
+
+    @cached_property
+    def refresh_seconds(self) -> float:
+        return get_settings().message_archive_refresh_seconds
+
+    def list_months(self) -> list[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted((entry.name for entry in self.root.iterdir() if entry.is_dir()), reverse=True)
+
+    async def months(self) -> list[str]:
+        # History pages consult the month list on every short page; the directory is listed off the event loop and
+        # at most once per refresh interval. Archive runs in other processes show up after that interval.
+        if self._months is None or time.monotonic() - self._months_loaded_at >= self.refresh_seconds:
+            self._months = await asyncio.to_thread(self.list_months)
+            self._months_loaded_at = time.monotonic()
+        return self._months
+
+    async def horizon(self) -> str | None:
+        months = await self.months()
+        return months[0] if months else None
+
+    def open_month(self, month: str) -> MonthWriter:
+        return MonthWriter(self.root / month, run=datetime.now(UTC).strftime("%Y%m%dT%H%M%S%f"))
+
+    def publish(self, writer: MonthWriter) -> None:
+        writer.publish()
+        self._months = None
+
+    def _scan(self, month: str, channel_id: UUID) -> Iterator[ArchivedMessage]:
+        directory = self.root / month
+        if not directory.is_dir():
+            return iter(())
+        files = [_read_file(path) for path in sorted(directory.glob(f"{channel_id}*.jsonl.gz"))]
+        return heapq.merge(*files, key=_key, reverse=True)
+
+    def read_before(self, months: list[str], channel_id: UUID, before: MessageCursor | None, limit: int) -> list[ArchivedMessage]:
+        # Months after the cursor's month cannot hold older rows, so a deep page skips them unread.
+        last_month = before[0].strftime("%Y_%m") if before is not None else None
+        rows: list[ArchivedMessage] = []
+        for month in months:
+            if last_month is not None and month > last_month:
+                continue
+            for message in self._scan(month, channel_id):
+                if before is not None and _key(message) >= before:
+                    continue
+                rows.append(message)
+                if len(rows) >= limit:
+                    return rows
+        return rows
+
+    def read_after(self, months: list[str], channel_id: UUID, after: MessageCursor, limit: int) -> list[ArchivedMessage]:
+        # Scans run newest first, so each month yields its rows newer than the cursor and stops at the first older one.
+        first_month = after[0].strftime("%Y_%m")
+        rows: list[ArchivedMessage] = []
+        for month in reversed(months):
+            if month < first_month:
+                continue
+            newer = list(takewhile(lambda message: _key(message) > after, self._scan(month, channel_id)))
+            rows.extend(reversed(newer))
+            if len(rows) >= limit:
+                break
+        return rows[:limit]
+
+    async def covers(self, cursor: MessageCursor) -> bool:
+        horizon = await self.horizon()
+        return horizon is not None and cursor[0].strftime("%Y_%m") <= horizon
+
+    async def before(self, channel_id: UUID, before: MessageCursor | None, limit: int) -> list[ArchivedMessage]:
+        return await asyncio.to_thread(self.read_before, await self.months(), channel_id, before, limit)
+
+    async def after(self, channel_id: UUID, after: MessageCursor, limit: int) -> list[ArchivedMessage]:
+        return await asyncio.to_thread(self.read_after, await self.months(), channel_id, after, limit)
+
+
+message_archive = MessageArchive()
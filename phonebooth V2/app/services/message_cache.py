@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import cached_property
+from uuid import UUID
+
+from sqlalchemy import Row
+
+from app.core.config import get_settings
+from app.core.serialization import dump_row, encode_json
+from app.models import Message
+from app.schemas.message import MessageOut
+from app.services.pagination import encode_cursor
+
+# Rough per-entry bookkeeping cost on top of the encoded payload.
+_ENTRY_OVERHEAD = 256
+
+
+@dataclass(slots=True)
+class CachedMessage:
+    id: UUID
+    created_at: datetime
+    cursor: str
+    payload: bytes
+
+    @property
+    def size(self) -> int:
+        return len(self.payload) + _ENTRY_OVERHEAD
+
+
+@dataclass(slots=True)
+class ChannelBuffer:
+    items: list[CachedMessage] = field(default_factory=list)
+    complete: bool = False
+    size: int = 0
+
+
+class MessageCache:
+    def __init__(self) -> None:
+        self._channels: OrderedDict[UUID, ChannelBuffer] = OrderedDict()
+        self._pending_fills: dict[UUID, object] = {}
+        self._size = 0
+
+    @cached_property
+    def channel_size(self) -> int:
+        return get_settings().message_cache_channel_size
+
+    @cached_property
+    def max_bytes(self) -> int:
+        return get_settings().message_cache_max_bytes
+
+    @staticmethod
+    def encode(message: Message | Row) -> CachedMessage:
+        return CachedMessage(
+            id=message.id,
+            created_at=message.created_at,
+            cursor=encode_cursor(message),
+            payload=encode_json(dump_row(message, MessageOut)),
+        )
+
+    def page(self, channel_id: UUID, limit: int) -> tuple[list[CachedMessage], bool] | None:
+        buffer = self._channels.get(channel_id)
+        if buffer is None:
+            return None
+        if len(buffer.items) <= limit and not buffer.complete:
+            return None
+        self._channels.move_to_end(channel_id)
+        return buffer.items[:limit], len(buffer.items) > limit
+
+    def begin_fill(self, channel_id: UUID) -> object:
+        token = object()
+        self._pending_fills[channel_id] = token
+        return token
+
+    def fill(self, channel_id: UUID, token: object, messages: Sequence[Message | Row], complete: bool) -> list[CachedMessage]:
+        items = [self.encode(message) for message in messages[: self.channel_size]]
+        # A mutation while the read was in flight means the rows may already be stale.
+        if self._pending_fills.get(channel_id) is not token:
+            return items
+        del self._pending_fills[channel_id]
+
+        self.drop(channel_id)
+        buffer = ChannelBuffer(items=items, complete=complete and len(messages) <= self.channel_size)
+        buffer.size = sum(item.size for item in items)
+        self._channels[channel_id] = buffer
+        self._size += buffer.size
+        self._evict()
+        return items
+
+    def add(self, message: Message) -> None:
+        self._pending_fills.pop(message.channel_id, None)
+        buffer = self._channels.get(message.channel_id)
+        if buffer is None:
+            return
+
+        item = self.encode(message)
+        key = (item.created_at, item.id)
+        index = 0
+        while index < len(buffer.items) and (buffer.items[index].created_at, buffer.items[index].id) > key:
+            index += 1
+        buffer.items.insert(index, item)
+        buffer.size += item.size
+        self._size += item.size
+
+        while len(buffer.items) > self.channel_size:
+            dropped = buffer.items.pop()
+            buffer.size -= dropped.size
+            self._size -= dropped.size
+            buffer.complete = False
+        self._evict()
+
+    def update(self, message: Message) -> None:
+        self._pending_fills.pop(message.channel_id, None)
+        buffer = self._channels.get(message.channel_id)
+        if buffer is None:
+            return
+
+        for index, current in enumerate(buffer.items):
+            if current.id == message.id:
+                item = self.encode(message)
+                buffer.items[index] = item
+                buffer.size += item.size - current.size
+                self._size += item.size - current.size
+                break
+        self._evict()
+
+    def remove(self, channel_id: UUID, message_id: UUID) -> None:
+        self._pending_fills.pop(channel_id, None)
+        buffer = self._channels.get(channel_id)
+        if buffer is None:
+            return
+
+        for index, current in enumerate(buffer.items):
+            if current.id == message_id:
+                del buffer.items[index]
+                buffer.size -= current.size
+                self._size -= current.size
+                break
+
+    def drop(self, channel_id: UUID) -> None:
+        self._pending_fills.pop(channel_id, None)
+        buffer = self._channels.pop(channel_id, None)
+        if buffer is not None:
+            self._size -= buffer.size
+
+    def clear(self) -> None:
+        self._channels.clear()
+        self._pending_fills.clear()
+        self._size = 0
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._channels:
+            _, buffer = self._channels.popitem(last=False)
+            self._size -= buffer.size
+
+
+message_cache = MessageCache()
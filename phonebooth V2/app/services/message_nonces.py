@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime
+from functools import cached_property
+from uuid import UUID
+
+from sqlalchemy import and_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.dialect import insert_for
+from app.models import Message, MessageNonce
+
+# (author_id, channel_id, nonce): a nonce only has to be unique per author and channel.
+NonceKey = tuple[UUID, UUID, str]
+
+
+class NonceCache:
+    def __init__(self) -> None:
+        self._entries: OrderedDict[NonceKey, tuple[float, Message]] = OrderedDict()
+        # Edits and deletes only know the message, so they find its entry through this reverse index.
+        self._keys: dict[UUID, NonceKey] = {}
+
+    @cached_property
+    def max_size(self) -> int:
+        return get_settings().message_nonce_cache_size
+
+    @cached_property
+    def ttl_seconds(self) -> float:
+        return get_settings().message_nonce_ttl_seconds
+
+    def get(self, key: NonceKey) -> Message | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, message = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._keys.pop(message.id, None)
+            return None
+        return message
+
+    def put(self, key: NonceKey, message: Message) -> None:
+        # Retries come soon after the original, so insertion order is close enough to LRU.
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, message)
+        self._entries.move_to_end(key)
+        self._keys[message.id] = key
+        while len(self._entries) > self.max_size:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._keys.pop(evicted.id, None)
+
+    def refresh(self, message: Message) -> None:
+        key = self._keys.get(message.id)
+        entry = self._entries.get(key) if key is not None else None
+        if entry is not None:
+            self._entries[key] = (entry[0], message)
+
+    def forget(self, message_id: UUID) -> None:
+        # A retry then misses the cache, hits the stored nonce and finds no message, which the caller reports as a conflict.
+        key = self._keys.pop(message_id, None)
+        if key is not None:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys.clear()
+
+
+nonce_cache = NonceCache()
+
+
+async def claim_nonces(db: AsyncSession, claims: Iterable[tuple[NonceKey, UUID, datetime]]) -> set[NonceKey]:
+    rows = [
+        {"author_id": author_id, "channel_id": channel_id, "nonce": nonce, "message_id": message_id, "message_created_at": created_at}
+        for (author_id, channel_id, nonce), message_id, created_at in claims
+    ]
+    insert = insert_for(db)
+    stmt = (
+        insert(MessageNonce)
+        .values(rows)
+        .on_conflict_do_nothing()
+        .returning(MessageNonce.author_id, MessageNonce.channel_id, MessageNonce.nonce)
+    )
+    return {tuple(row) for row in await db.execute(stmt)}
+
+
+async def find_originals(db: AsyncSession, keys: list[NonceKey]) -> dict[NonceKey, Message]:
+    stmt = (
+        select(MessageNonce.author_id, MessageNonce.channel_id, MessageNonce.nonce, Message)
+        .join(Message, and_(Message.id == MessageNonce.message_id, Message.created_at == MessageNonce.message_created_at))
+        .where(tuple_(MessageNonce.author_id, MessageNonce.channel_id, MessageNonce.nonce).in_(keys))
+    )
+    originals = {(author_id, channel_id, nonce): message for author_id, channel_id, nonce, message in await db.execute(stmt)}
+    for key, message in originals.items():
+        nonce_cache.put(key, message)
+    return originals
@@ -0,0 +1,188 @@
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import cached_property
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.core.ids import id_generator, id_timestamp
+from app.db.session import AsyncSessionLocal, mark_writer
+from app.models import Message
+from app.services.events import event_bus
+from app.services.message_cache import message_cache
+from app.services.message_nonces import NonceKey, claim_nonces, find_originals, nonce_cache
+from app.services.message_service import message_event_data
+from app.services.read_state_service import record_new_messages
+
+
+@dataclass(slots=True)
+class PendingMessage:
+    channel_id: UUID
+    author_id: UUID
+    content: str
+    message_id: uuid.UUID
+    created_at: datetime
+    nonce: str | None
+    future: asyncio.Future = field(repr=False)
+
+    @property
+    def nonce_key(self) -> NonceKey | None:
+        return None if self.nonce is None else (self.author_id, self.channel_id, self.nonce)
+
+
+class MessageIngestPipeline:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self._queue: asyncio.Queue[PendingMessage] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._in_flight: dict[NonceKey, PendingMessage] = {}
+
+    @cached_property
+    def window(self) -> float:
+        return get_settings().message_batch_window_ms / 1000
+
+    @cached_property
+    def max_batch(self) -> int:
+        return get_settings().message_batch_max_size
+
+    async def submit(self, channel_id: UUID, author_id: UUID, content: str, nonce: str | None = None) -> Message:
+        key = (author_id, channel_id, nonce) if nonce is not None else None
+        if key is not None:
+            if (original := nonce_cache.get(key)) is not None:
+                return original
+            # A retry racing the original's batch waits for it instead of claiming the nonce a second time.
+            if (in_flight := self._in_flight.get(key)) is not None:
+                return await asyncio.shield(in_flight.future)
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        # Stamped at submission so rows flushed in one transaction keep their arrival order.
+        message_id = id_generator.next_id()
+        pending = PendingMessage(
+            channel_id=channel_id,
+            author_id=author_id,
+            content=content,
+            message_id=message_id,
+            created_at=id_timestamp(message_id),
+            nonce=nonce,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        if key is not None:
+            self._in_flight[key] = pending
+        try:
+            await self._queue.put(pending)
+            return await pending.future
+        finally:
+            if key is not None and self._in_flight.get(key) is pending:
+                del self._in_flight[key]
+
+    async def close(self) -> None:
+        if self._worker is None:
+            return
+        # Let queued messages become durable before the worker goes away.
+        if not self._worker.done():
+            await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def _drain(self, limit: int) -> list[PendingMessage]:
+        batch: list[PendingMessage] = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                batch.extend(self._drain(self.max_batch - len(batch)))
+                remaining = deadline - loop.time()
+                if len(batch) >= self.max_batch or remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[PendingMessage]) -> None:
+        error: Exception | None = None
+        try:
+            created, originals = await self._write(batch)
+        except Exception as exc:  # noqa: BLE001
+            if len(batch) > 1:
+                # One bad item, e.g. a channel deleted after submit, must not fail the others: retry each item in
+                # its own transaction so only its sender gets the error.
+                for item in batch:
+                    await self._flush([item])
+                return
+            created, originals, error = {}, {}, exc
+
+        for item in batch:
+            message = created.get(item.message_id)
+            if message is not None:
+                message_cache.add(message)
+                if item.nonce_key is not None:
+                    nonce_cache.put(item.nonce_key, message)
+            else:
+                message = originals.get(item.nonce_key)
+            if not item.future.done():
+                if error is not None:
+                    item.future.set_exception(error)
+                elif message is None:
+                    item.future.set_exception(LookupError("Nonce already used by a message that no longer exists"))
+                else:
+                    item.future.set_result(message)
+            self._queue.task_done()
+
+    async def _write(self, batch: list[PendingMessage]) -> tuple[dict[uuid.UUID, Message], dict[NonceKey, Message]]:
+        originals: dict[NonceKey, Message] = {}
+        async with self.session_factory() as db:
+            for item in batch:
+                mark_writer(db, item.author_id)
+            # Nonces are claimed first; an item whose nonce is already taken is a retry and inserts nothing.
+            claims = [(item.nonce_key, item.message_id, item.created_at) for item in batch if item.nonce_key is not None]
+            claimed = await claim_nonces(db, claims) if claims else set()
+            fresh = [item for item in batch if item.nonce_key is None or item.nonce_key in claimed]
+            rows = [
+                {
+                    "id": item.message_id,
+                    "channel_id": item.channel_id,
+                    "author_id": item.author_id,
+                    "content": item.content,
+                    "created_at": item.created_at,
+                }
+                for item in fresh
+            ]
+            messages: list[Message] = []
+            if rows:
+                stmt = insert(Message).returning(Message, sort_by_parameter_order=True)
+                messages = list((await db.scalars(stmt, rows)).all())
+            newest: dict[UUID, Message] = {}
+            counts: dict[UUID, int] = {}
+            for message in messages:
+                counts[message.channel_id] = counts.get(message.channel_id, 0) + 1
+                newest[message.channel_id] = message
+            for channel_id, message in newest.items():
+                await record_new_messages(db, channel_id, counts[channel_id], message.id, message.created_at)
+            for item, message in zip(fresh, messages, strict=True):
+                event_bus.emit(db, "MESSAGE_CREATE", message_event_data(message, item.nonce), channel_id=message.channel_id)
+            await db.commit()
+            retried = [item.nonce_key for item in batch if item.nonce_key is not None and item.nonce_key not in claimed]
+            if retried:
+                originals = await find_originals(db, retried)
+        return {message.id: message for message in messages}, originals
+
+
+message_pipeline = MessageIngestPipeline(AsyncSessionLocal)
@@ -1,35 +1,104 @@
 from datetime import UTC, datetime
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, delete, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Message
+from app.core.serialization import columns_for
+from app.models import Attachment, Message
+from app.schemas.message import MessageOut
+from app.services.events import event_bus
+from app.services.message_archive import ArchivedMessage, message_archive
+from app.services.message_cache import message_cache
+from app.services.message_nonces import claim_nonces, find_originals, nonce_cache
+from app.services.pagination import MessageCursor
+from app.services.read_state_service import record_deleted_message, record_new_messages
 
 
-async def create_message(db: AsyncSession, channel_id: UUID, author_id: UUID, content: str) -> Message:
+def message_event_data(message: Message, nonce: str | None = None) -> dict:
+    data = MessageOut.model_validate(message, from_attributes=True).model_dump(mode="json")
+    if nonce is not None:
+        data["nonce"] = nonce
+    return data
+
+
+async def create_message(db: AsyncSession, channel_id: UUID, author_id: UUID, content: str, nonce: str | None = None) -> Message:
+    key = (author_id, channel_id, nonce) if nonce is not None else None
+    if key is not None and (original := nonce_cache.get(key)) is not None:
+        return original
+
     message = Message(channel_id=channel_id, author_id=author_id, content=content)
     db.add(message)
+    await db.flush()
+    if key is not None and not await claim_nonces(db, [(key, message.id, message.created_at)]):
+        # Another attempt already holds the nonce; the rollback drops this row and its MESSAGE_CREATE.
+        await db.rollback()
+        original = (await find_originals(db, [key])).get(key)
+        if original is None:
+            raise LookupError("Nonce already used by a message that no longer exists")
+        return original
+
+    await record_new_messages(db, channel_id, 1, message.id, message.created_at)
+    event_bus.emit(db, "MESSAGE_CREATE", message_event_data(message, nonce), channel_id=channel_id)
     await db.commit()
     await db.refresh(message)
+    message_cache.add(message)
+    if key is not None:
+        nonce_cache.put(key, message)
     return message
 
 
 async def edit_message(db: AsyncSession, message: Message, content: str) -> Message:
     message.content = content
     message.edited_at = datetime.now(UTC)
+    event_bus.emit(db, "MESSAGE_UPDATE", message_event_data(message), channel_id=message.channel_id)
     await db.commit()
     await db.refresh(message)
+    message_cache.update(message)
+    nonce_cache.refresh(message)
     return message
 
 
+async def delete_message(db: AsyncSession, message: Message) -> None:
+    await db.delete(message)
+    await db.execute(delete(Attachment).where(Attachment.message_id == message.id))
+    await record_deleted_message(db, message)
+    event_bus.emit(
+        db, "MESSAGE_DELETE", {"id": str(message.id), "channel_id": str(message.channel_id)}, channel_id=message.channel_id
+    )
+    await db.commit()
+    message_cache.remove(message.channel_id, message.id)
+    nonce_cache.forget(message.id)
+
+
 async def list_messages(
     db: AsyncSession,
     channel_id: UUID,
     limit: int,
-    before: datetime | None,
-) -> list[Message]:
-    stmt = select(Message).where(Message.channel_id == channel_id).order_by(Message.created_at.desc()).limit(limit)
-    if before:
-        stmt = stmt.where(Message.created_at < before)
-    return (await db.execute(stmt)).scalars().all()
+    before: MessageCursor | None = None,
+    after: MessageCursor | None = None,
+) -> tuple[list[Row | ArchivedMessage], bool]:
+    key = tuple_(Message.created_at, Message.id)
+    stmt = select(*columns_for(Message, MessageOut)).where(Message.channel_id == channel_id)
+
+    if after is not None:
+        # Archived rows are all older than the hot table, so a forward page starts in the archive.
+        archived = await message_archive.after(channel_id, after, limit + 1) if await message_archive.covers(after) else []
+        rows: list[Row | ArchivedMessage] = list(archived)
+        if len(rows) <= limit:
+            stmt = stmt.where(key > tuple_(*after)).order_by(Message.created_at.asc(), Message.id.asc())
+            rows.extend((await db.execute(stmt.limit(limit + 1 - len(rows)))).all())
+    else:
+        if before is not None:
+            stmt = stmt.where(key < tuple_(*before))
+        stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc())
+        rows = list((await db.execute(stmt.limit(limit + 1))).all())
+        if len(rows) <= limit and await message_archive.horizon() is not None:
+            cursor = (rows[-1].created_at, rows[-1].id) if rows else before
+            rows.extend(await message_archive.before(channel_id, cursor, limit + 1 - len(rows)))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if after is not None:
+        rows.reverse()
+    return rows, has_more
@@ -0,0 +1,35 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Row
+
+from app.core.ids import id_timestamp
+from app.models import Message
+
+MessageCursor = tuple[datetime, UUID]
+
+
+def encode_cursor(message: Message | Row) -> str:
+    raw = f"{message.created_at.isoformat()}|{message.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> MessageCursor:
+    # A time-ordered message id is a cursor on its own: its timestamp is the message's created_at.
+    if len(cursor) == 36:
+        try:
+            message_id = UUID(cursor)
+        except ValueError:
+            pass
+        else:
+            created_at = id_timestamp(message_id)
+            if created_at is None:
+                raise ValueError("Invalid cursor")
+            return created_at, message_id
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(message_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,115 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import Row, and_, case, func, literal, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import insert_for
+from app.models import Channel, Message, ReadState, ServerMember
+
+# Acks on very old messages count at most this many newer rows; beyond it the unread count saturates.
+ACK_SCAN_LIMIT = 10_000
+
+
+async def record_new_messages(db: AsyncSession, channel_id: UUID, count: int, last_id: UUID, last_at: datetime) -> None:
+    newer = or_(Channel.last_message_at.is_(None), Channel.last_message_at <= last_at)
+    await db.execute(
+        update(Channel)
+        .where(Channel.id == channel_id)
+        .values(
+            message_count=Channel.message_count + count,
+            last_message_id=case((newer, last_id), else_=Channel.last_message_id),
+            last_message_at=case((newer, last_at), else_=Channel.last_message_at),
+        )
+    )
+
+
+async def record_deleted_message(db: AsyncSession, message: Message) -> None:
+    stmt = (
+        update(Channel)
+        .where(Channel.id == message.channel_id)
+        .values(message_count=Channel.message_count - 1)
+        .returning(Channel.last_message_id)
+    )
+    last_message_id = (await db.execute(stmt)).scalar_one_or_none()
+    # Readers whose marker is at or past the deleted message had counted it; keep read_count <= message_count.
+    await db.execute(
+        update(ReadState)
+        .where(
+            ReadState.channel_id == message.channel_id,
+            tuple_(ReadState.last_read_at, ReadState.last_read_message_id) >= tuple_(message.created_at, message.id),
+        )
+        .values(read_count=ReadState.read_count - 1)
+    )
+    if last_message_id != message.id:
+        return
+
+    latest = (
+        await db.execute(
+            select(Message.id, Message.created_at)
+            .where(Message.channel_id == message.channel_id, Message.id != message.id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+        )
+    ).first()
+    await db.execute(
+        update(Channel)
+        .where(Channel.id == message.channel_id)
+        .values(last_message_id=latest.id if latest else None, last_message_at=latest.created_at if latest else None)
+    )
+
+
+async def ack_message(db: AsyncSession, user_id: UUID, channel_id: UUID, message_id: UUID) -> bool:
+    stmt = select(Message.created_at).where(Message.id == message_id, Message.channel_id == channel_id)
+    created_at = (await db.execute(stmt)).scalar_one_or_none()
+    if created_at is None:
+        return False
+
+    newer = (
+        select(literal(1))
+        .where(Message.channel_id == channel_id, tuple_(Message.created_at, Message.id) > tuple_(created_at, message_id))
+        .limit(ACK_SCAN_LIMIT)
+        .subquery()
+    )
+    newer_count = await db.scalar(select(func.count()).select_from(newer))
+    message_count = await db.scalar(select(Channel.message_count).where(Channel.id == channel_id))
+
+    insert = insert_for(db)
+    upsert = insert(ReadState).values(
+        user_id=user_id,
+        channel_id=channel_id,
+        last_read_message_id=message_id,
+        last_read_at=created_at,
+        read_count=max(0, (message_count or 0) - newer_count),
+    )
+    # Read markers only move forward, so a late ack from another device cannot resurrect unread messages.
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[ReadState.user_id, ReadState.channel_id],
+        set_={
+            "last_read_message_id": upsert.excluded.last_read_message_id,
+            "last_read_at": upsert.excluded.last_read_at,
+            "read_count": upsert.excluded.read_count,
+        },
+        where=or_(ReadState.last_read_at.is_(None), ReadState.last_read_at <= upsert.excluded.last_read_at),
+    )
+    await db.execute(upsert)
+    await db.commit()
+    return True
+
+
+async def list_read_states(db: AsyncSession, user_id: UUID) -> list[Row]:
+    unread = Channel.message_count - func.coalesce(ReadState.read_count, 0)
+    stmt = (
+        select(
+            Channel.id.label("channel_id"),
+            Channel.server_id,
+            Channel.last_message_id,
+            ReadState.last_read_message_id,
+            case((unread < 0, 0), else_=unread).label("unread_count"),
+        )
+        .join(ServerMember, ServerMember.server_id == Channel.server_id)
+        .outerjoin(ReadState, and_(ReadState.channel_id == Channel.id, ReadState.user_id == user_id))
+        .where(ServerMember.user_id == user_id)
+        .order_by(Channel.server_id, Channel.position.asc(), Channel.created_at.asc())
+    )
+    return list((await db.execute(stmt)).all())
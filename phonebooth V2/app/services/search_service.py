@@ -0,0 +1,60 @@
+from uuid import UUID
+
+from sqlalchemy import Row, Select, column, func, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.serialization import columns_for
+from app.models import Channel, Message
+from app.models.message import message_search_document
+from app.schemas.message import MessageOut
+
+_messages_fts = table("messages_fts", column("rowid"))
+
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input cannot reach FTS5 query syntax.
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def _postgres_search(query: str) -> Select:
+    tsquery = func.websearch_to_tsquery(text("'simple'::regconfig"), query)
+    rank = func.ts_rank_cd(message_search_document, tsquery)
+    return (
+        select(*columns_for(Message, MessageOut))
+        .where(message_search_document.op("@@")(tsquery))
+        .order_by(rank.desc(), Message.created_at.desc(), Message.id.desc())
+    )
+
+
+def _sqlite_search(query: str) -> Select:
+    rank = func.bm25(literal_column("messages_fts"))
+    return (
+        select(*columns_for(Message, MessageOut))
+        .join(_messages_fts, _messages_fts.c.rowid == literal_column("messages.rowid"))
+        .where(literal_column("messages_fts").op("MATCH")(_fts5_query(query)))
+        .order_by(rank.asc(), Message.created_at.desc(), Message.id.desc())
+    )
+
+
+async def search_messages(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    offset: int,
+    channel_id: UUID | None = None,
+    server_id: UUID | None = None,
+) -> tuple[list[Row], bool]:
+    if not query.split():
+        return [], False
+    if db.get_bind().dialect.name == "sqlite":
+        stmt = _sqlite_search(query)
+    else:
+        stmt = _postgres_search(query)
+
+    if channel_id is not None:
+        stmt = stmt.where(Message.channel_id == channel_id)
+    if server_id is not None:
+        stmt = stmt.where(Message.channel_id.in_(select(Channel.id).where(Channel.server_id == server_id)))
+
+    rows = list((await db.execute(stmt.limit(limit + 1).offset(offset))).all())
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.dialect import insert_for
+from app.models import User
+
+
+class UserCache:
+    def __init__(self) -> None:
+        self._entries: OrderedDict[UUID, tuple[float, User]] = OrderedDict()
+
+    @cached_property
+    def max_size(self) -> int:
+        return get_settings().user_cache_size
+
+    @cached_property
+    def ttl_seconds(self) -> float:
+        return get_settings().user_cache_ttl_seconds
+
+    def get(self, supabase_user_id: UUID) -> User | None:
+        entry = self._entries.get(supabase_user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[supabase_user_id]
+            return None
+        self._entries.move_to_end(supabase_user_id)
+        return user
+
+    def put(self, user: User) -> None:
+        self._entries[user.supabase_user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user.supabase_user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, supabase_user_id: UUID) -> None:
+        self._entries.pop(supabase_user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def _profile_from_payload(supabase_user_id: UUID, payload: dict[str, Any]) -> dict[str, Any]:
+    raw_meta = payload.get("user_metadata") or {}
+    username = raw_meta.get("username") or raw_meta.get("full_name") or payload.get("email") or f"user-{str(supabase_user_id)[:8]}"
+    return {"supabase_user_id": supabase_user_id, "username": username, "avatar_url": raw_meta.get("avatar_url")}
+
+
+async def resolve_user(db: AsyncSession, supabase_user_id: UUID, payload: dict[str, Any]) -> User:
+    user = user_cache.get(supabase_user_id)
+    if user is not None:
+        return user
+
+    stmt = select(User).where(User.supabase_user_id == supabase_user_id)
+    user = (await db.execute(stmt)).scalar_one_or_none()
+
+    if user is None:
+        # A no-op update on conflict makes RETURNING yield the row that won a concurrent first sight.
+        insert = insert_for(db)
+        upsert = insert(User).values(**_profile_from_payload(supabase_user_id, payload))
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[User.supabase_user_id],
+            set_={"supabase_user_id": upsert.excluded.supabase_user_id},
+        )
+        user = (await db.scalars(upsert.returning(User), execution_options={"populate_existing": True})).one()
+        await db.commit()
+
+    # Cached rows are shared across sessions, so they must not stay attached to this one.
+    db.expunge(user)
+    user_cache.put(user)
+    return user
@@ -0,0 +1,75 @@
+import zlib
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import msgpack
+import orjson
+from fastapi import WebSocket
+
+from app.core.serialization import encode_json
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def encode_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default)
+
+
+ENCODERS = {"json": encode_json, "msgpack": encode_msgpack}
+COMPRESSIONS = {"zlib-stream"}
+
+
+class GatewayCodec:
+    def __init__(self, encoding: str = "json", compress: str | None = None) -> None:
+        if encoding not in ENCODERS:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+        if compress is not None and compress not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compress}")
+        self.encoding = encoding
+        self.compress = compress
+        # zlib-stream shares one deflate context for the whole connection so later frames reuse earlier history.
+        self._deflate = zlib.compressobj() if compress else None
+
+    @property
+    def binary(self) -> bool:
+        return self.encoding != "json" or self._deflate is not None
+
+    def encode(self, payload: dict[str, Any]) -> bytes:
+        return ENCODERS[self.encoding](payload)
+
+    def encode_event(self, event_type: str, seq: int | None, encoded_data: bytes) -> bytes:
+        # Splices an already-encoded ``d`` so fan-out only serializes the payload once per encoding.
+        if self.encoding == "msgpack":
+            header = msgpack.packb("t") + msgpack.packb(event_type) + msgpack.packb("s") + msgpack.packb(seq)
+            return b"\x83" + header + msgpack.packb("d") + encoded_data
+        return b'{"t":' + encode_json(event_type) + b',"s":' + encode_json(seq) + b',"d":' + encoded_data + b"}"
+
+    def frame(self, encoded: bytes) -> bytes:
+        if self._deflate is None:
+            return encoded
+        return self._deflate.compress(encoded) + self._deflate.flush(zlib.Z_SYNC_FLUSH)
+
+    def decode(self, message: dict[str, Any]) -> Any:
+        data = message.get("bytes")
+        if data is None:
+            data = (message.get("text") or "").encode()
+        if self.encoding == "msgpack":
+            return msgpack.unpackb(data)
+        return orjson.loads(data)
+
+    async def send(self, websocket: WebSocket, payload: dict[str, Any]) -> None:
+        await self.send_encoded(websocket, self.encode(payload))
+
+    async def send_encoded(self, websocket: WebSocket, encoded: bytes) -> None:
+        framed = self.frame(encoded)
+        if self.binary:
+            await websocket.send_bytes(framed)
+        else:
+            await websocket.send_text(framed.decode())
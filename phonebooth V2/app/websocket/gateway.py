@@ -1,17 +1,179 @@
+import logging
+from collections.abc import Hashable
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 from pydantic import ValidationError
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_or_create_user_from_token, require_channel_member
-from app.db.session import AsyncSessionLocal
-from app.schemas.message import CreateMessageIn, MessageOut
-from app.schemas.ws import GatewayEventIn
+from app.api.deps import get_or_create_user_from_token, list_member_server_ids, require_channel_member, require_server_member
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal, mark_writer
+from app.models import Channel
+from app.schemas.ws import (
+    AckOp,
+    GatewayOp,
+    JoinChannelOp,
+    JoinServerOp,
+    LeaveChannelOp,
+    LeaveServerOp,
+    PresenceUpdateOp,
+    SendMessageOp,
+    TypingStartOp,
+    gateway_op_adapter,
+)
+from app.services.message_pipeline import message_pipeline
 from app.services.message_service import create_message
-from app.websocket.manager import manager
+from app.services.read_state_service import ack_message
+from app.websocket.codec import GatewayCodec
+from app.websocket.manager import GatewaySession, manager
+from app.websocket.presence import presence_tracker, typing_tracker
+from app.websocket.ratelimit import rate_limiter
+from app.websocket.scheduler import OpScheduler
 
 router = APIRouter(tags=["gateway"])
+logger = logging.getLogger("app.gateway")
+
+
+def _validation_message(exc: ValidationError) -> str:
+    for error in exc.errors():
+        if error["type"] == "union_tag_invalid":
+            return "Unknown opcode"
+        if "channel_id" in error["loc"]:
+            return "Invalid channel_id"
+        if "server_id" in error["loc"]:
+            return "Invalid server_id"
+    return "Invalid gateway payload"
+
+
+async def _require_channel(db: AsyncSession, session: GatewaySession, channel_id: UUID) -> None:
+    # Subscriptions are dropped on channel or server deletion and on revocation, so a subscribed channel is authorized.
+    if channel_id not in session.channels:
+        await require_channel_member(db, channel_id, session.user_id)
+
+
+async def _reply(session: GatewaySession, event_type: str, data: dict[str, Any], ref: str | None) -> None:
+    if ref is not None:
+        data["ref"] = ref
+    await manager.send(session, event_type, data)
+
+
+def _raw_ref(payload: Any) -> str | None:
+    ref = payload.get("ref") if isinstance(payload, dict) else None
+    return ref if isinstance(ref, str) and len(ref) <= 64 else None
+
+
+def _is_barrier(event: GatewayOp) -> bool:
+    # Joining or leaving a server changes the subscriptions that later channel ops (typing, ack) check, so those
+    # ops must not overtake it on their own channel lanes.
+    return isinstance(event, JoinServerOp | LeaveServerOp)
+
+
+def _ordering_key(event: GatewayOp) -> Hashable:
+    # Channel ops share one lane per channel; everything else is ordered per op type and target.
+    data = event.d
+    if hasattr(data, "channel_id"):
+        return data.channel_id
+    if hasattr(data, "server_id"):
+        return ("server", data.server_id)
+    return event.op
+
+
+async def _handle(session: GatewaySession, event: GatewayOp) -> None:
+    ref = event.ref
+    try:
+        # One short-lived session per op: a socket no longer pins a pooled connection for its whole lifetime,
+        # and concurrent ops never share a session. Nothing is checked out until an op actually queries.
+        async with AsyncSessionLocal() as db:
+            mark_writer(db, session.user_id)
+            await _dispatch(db, session, event, ref)
+    except HTTPException as exc:
+        await _reply(session, "ERROR", {"message": exc.detail}, ref)
+    except LookupError as exc:
+        await _reply(session, "ERROR", {"message": str(exc)}, ref)
+    except Exception:  # noqa: BLE001
+        logger.exception("gateway op %s failed", event.op)
+        await _reply(session, "ERROR", {"message": "Internal error"}, ref)
+
+
+async def _dispatch(db: AsyncSession, session: GatewaySession, event: GatewayOp, ref: str | None) -> None:
+    user_id = session.user_id
+
+    if isinstance(event, JoinServerOp):
+        server_id = event.d.server_id
+        await require_server_member(db, server_id, user_id)
+        channel_ids = (await db.scalars(select(Channel.id).where(Channel.server_id == server_id))).all()
+        await manager.subscribe_server(server_id, session, channel_ids)
+        data = {"server_id": str(server_id), "channel_ids": [str(channel_id) for channel_id in channel_ids]}
+        await _reply(session, "SERVER_JOINED", data, ref)
+
+    elif isinstance(event, LeaveServerOp):
+        server_id = event.d.server_id
+        subscribed = set(session.channels)
+        await manager.unsubscribe_server(server_id, session)
+        for channel_id in subscribed - session.channels:
+            typing_tracker.stop(user_id, channel_id, announce=True)
+        await _reply(session, "SERVER_LEFT", {"server_id": str(server_id)}, ref)
+
+    elif isinstance(event, JoinChannelOp):
+        channel_id = event.d.channel_id
+        if channel_id not in session.channels:
+            channel = await require_channel_member(db, channel_id, user_id)
+            await manager.subscribe(channel_id, session, channel.server_id)
+        await _reply(session, "CHANNEL_JOINED", {"channel_id": str(channel_id)}, ref)
+
+    elif isinstance(event, LeaveChannelOp):
+        channel_id = event.d.channel_id
+        await manager.unsubscribe(channel_id, session)
+        if channel_id not in session.channels:
+            typing_tracker.stop(user_id, channel_id, announce=True)
+        await _reply(session, "CHANNEL_LEFT", {"channel_id": str(channel_id)}, ref)
+
+    elif isinstance(event, TypingStartOp):
+        # Only joined channels qualify, so typing never needs a membership query.
+        if event.d.channel_id not in session.channels:
+            await _reply(session, "ERROR", {"message": "Join the channel before typing"}, ref)
+            return
+        await typing_tracker.start(user_id, event.d.channel_id)
+
+    elif isinstance(event, PresenceUpdateOp):
+        presence_tracker.set_status(user_id, event.d.status)
+
+    elif isinstance(event, AckOp):
+        channel_id, message_id = event.d.channel_id, event.d.message_id
+        await _require_channel(db, session, channel_id)
+        if not await ack_message(db, user_id, channel_id, message_id):
+            await _reply(session, "ERROR", {"message": "Message not found"}, ref)
+            return
+        await _reply(session, "MESSAGE_ACK", {"channel_id": str(channel_id), "message_id": str(message_id)}, ref)
+
+    elif isinstance(event, SendMessageOp):
+        channel_id = event.d.channel_id
+        await _require_channel(db, session, channel_id)
+        typing_tracker.stop(user_id, channel_id)
+
+        # MESSAGE_CREATE reaches subscribers through the event bus once the insert commits; a retried
+        # nonce resolves to the original message and publishes nothing.
+        if get_settings().message_batching_enabled:
+            message = await message_pipeline.submit(channel_id, user_id, event.d.content, event.d.nonce)
+        else:
+            message = await create_message(db, channel_id, user_id, event.d.content, event.d.nonce)
+        # Only clients that tag their sends get a per-op ack; the rest rely on MESSAGE_CREATE as before.
+        if ref is not None:
+            await _reply(session, "MESSAGE_SENT", {"id": str(message.id), "channel_id": str(channel_id)}, ref)
+
+
+async def _resume(websocket: WebSocket, user_id: UUID, codec: GatewayCodec) -> GatewaySession | None:
+    session_id = websocket.query_params.get("session_id")
+    if not session_id:
+        return None
+    try:
+        seq = int(websocket.query_params.get("seq", "0"))
+    except ValueError:
+        return None
+    return await manager.resume_session(websocket, session_id, user_id, seq, codec)
 
 
 @router.websocket("/gateway")
@@ -21,65 +183,77 @@ async def gateway(websocket: WebSocket) -> None:
         await websocket.close(code=4401)
         return
 
-    await websocket.accept()
+    try:
+        codec = GatewayCodec(
+            encoding=websocket.query_params.get("encoding", "json"),
+            compress=websocket.query_params.get("compress"),
+        )
+    except ValueError:
+        await websocket.close(code=4400)
+        return
 
-    active_channels: set[UUID] = set()
+    await websocket.accept()
+    session: GatewaySession | None = None
+    scheduler = OpScheduler(get_settings().gateway_max_inflight_ops)
 
     try:
         async with AsyncSessionLocal() as db:
             user = await get_or_create_user_from_token(db, token)
+            mark_writer(db, user.id)
+
+            session = await _resume(websocket, user.id, codec)
+            if session is None:
+                session = manager.open_session(websocket, user.id, codec)
+                server_ids = await list_member_server_ids(db, user.id)
+                presence_tracker.connect(session, server_ids)
+            else:
+                server_ids = None
+
+        if server_ids is None:
+            await manager.send(session, "RESUMED", {"session_id": session.session_id})
+        else:
+            if websocket.query_params.get("session_id"):
+                await manager.send(session, "INVALID_SESSION", {"session_id": websocket.query_params["session_id"]})
+            await manager.send(
+                session,
+                "READY",
+                {
+                    "session_id": session.session_id,
+                    "user_id": str(user.id),
+                    "presences": presence_tracker.snapshot(server_ids),
+                },
+            )
+
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+
+            payload = None
+            try:
+                payload = codec.decode(frame)
+                event = gateway_op_adapter.validate_python(payload)
+            except ValidationError as exc:
+                await _reply(session, "ERROR", {"message": _validation_message(exc)}, _raw_ref(payload))
+                continue
+            except ValueError:
+                await _reply(session, "ERROR", {"message": "Invalid gateway payload"}, _raw_ref(payload))
+                continue
+
+            limited = rate_limiter.check(event.op, session.session_id, user.id)
+            if limited is not None:
+                scope, retry_after = limited
+                data = {"op": event.op, "scope": scope, "retry_after": round(retry_after, 3)}
+                await _reply(session, "RATE_LIMITED", data, event.ref)
+                continue
 
-            while True:
-                raw_event = await websocket.receive_json()
-
-                try:
-                    event = GatewayEventIn.model_validate(raw_event)
-                except ValidationError:
-                    await websocket.send_json({"t": "ERROR", "d": {"message": "Invalid gateway payload"}})
-                    continue
-
-                if event.op == "join_channel":
-                    try:
-                        channel_id = UUID(str(event.d.get("channel_id")))
-                    except ValueError:
-                        await websocket.send_json({"t": "ERROR", "d": {"message": "Invalid channel_id"}})
-                        continue
-                    await require_channel_member(db, channel_id, user.id)
-                    await manager.subscribe(channel_id, websocket)
-                    active_channels.add(channel_id)
-                    await websocket.send_json({"t": "CHANNEL_JOINED", "d": {"channel_id": str(channel_id)}})
-                    continue
-
-                if event.op == "leave_channel":
-                    try:
-                        channel_id = UUID(str(event.d.get("channel_id")))
-                    except ValueError:
-                        await websocket.send_json({"t": "ERROR", "d": {"message": "Invalid channel_id"}})
-                        continue
-                    if channel_id in active_channels:
-                        await manager.unsubscribe(channel_id, websocket)
-                        active_channels.discard(channel_id)
-                    await websocket.send_json({"t": "CHANNEL_LEFT", "d": {"channel_id": str(channel_id)}})
-                    continue
-
-                if event.op == "send_message":
-                    try:
-                        channel_id = UUID(str(event.d.get("channel_id")))
-                    except ValueError:
-                        await websocket.send_json({"t": "ERROR", "d": {"message": "Invalid channel_id"}})
-                        continue
-                    await require_channel_member(db, channel_id, user.id)
-
-                    payload = CreateMessageIn.model_validate({"content": event.d.get("content")})
-                    message = await create_message(db, channel_id, user.id, payload.content)
-                    data = MessageOut.model_validate(message, from_attributes=True).model_dump(mode="json")
-
-                    await manager.broadcast(channel_id, "MESSAGE_CREATE", data)
-                    continue
-
-                await websocket.send_json({"t": "ERROR", "d": {"message": "Unknown opcode"}})
+            await scheduler.submit(
+                _ordering_key(event), lambda event=event: _handle(session, event), barrier=_is_barrier(event)
+            )
     except WebSocketDisconnect:
         pass
     finally:
-        for channel_id in active_channels:
-            await manager.unsubscribe(channel_id, websocket)
+        await scheduler.drain()
+        # Subscriptions outlive the socket for the resume window; the manager drops them on expiry.
+        if session is not None:
+            manager.detach(session, websocket)
@@ -1,35 +1,352 @@
-from collections import defaultdict
+import asyncio
+import secrets
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Any
 from uuid import UUID
 
 from fastapi import WebSocket
 
+from app.core.config import get_settings
+from app.core.metrics import COUNT_BUCKETS, Sample, metrics
+from app.services.events import DomainEvent, event_bus
+from app.websocket.codec import ENCODERS, GatewayCodec
+from app.websocket.ratelimit import rate_limiter
+
+
+@dataclass(slots=True, eq=False)
+class GatewaySession:
+    session_id: str
+    user_id: UUID
+    codec: GatewayCodec
+    websocket: WebSocket | None = None
+    servers: set[UUID] = field(default_factory=set)
+    channels: set[UUID] = field(default_factory=set)
+    seq: int = 0
+    replay: deque[tuple[int, str, dict[str, Any]]] = field(default_factory=deque)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    expiry: asyncio.TimerHandle | None = None
+    outbox: asyncio.Queue[bytes] | None = None
+    sender: asyncio.Task | None = None
+
 
 class GatewayManager:
     def __init__(self) -> None:
-        self.connections_by_channel: dict[UUID, set[WebSocket]] = defaultdict(set)
+        self.sessions: dict[str, GatewaySession] = {}
+        self.sessions_by_channel: dict[UUID, set[GatewaySession]] = defaultdict(set)
+        self.server_by_channel: dict[UUID, UUID] = {}
+        # Server subscribers are expanded into every channel of the server, so channel fan-out stays one lookup.
+        self.sessions_by_server: dict[UUID, set[GatewaySession]] = defaultdict(set)
+        self.channels_by_server: dict[UUID, set[UUID]] = defaultdict(set)
+        self.sessions_by_user: dict[UUID, set[GatewaySession]] = defaultdict(set)
+        self.on_session_closed: list[Callable[[GatewaySession], None]] = []
+        self._closing: set[asyncio.Task] = set()
+
+    @cached_property
+    def replay_size(self) -> int:
+        return get_settings().gateway_replay_buffer_size
+
+    @cached_property
+    def resume_window(self) -> float:
+        return get_settings().gateway_resume_window_seconds
 
-    async def subscribe(self, channel_id: UUID, websocket: WebSocket) -> None:
-        self.connections_by_channel[channel_id].add(websocket)
+    @cached_property
+    def send_queue_size(self) -> int:
+        return get_settings().gateway_send_queue_size
 
-    async def unsubscribe(self, channel_id: UUID, websocket: WebSocket) -> None:
-        if channel_id in self.connections_by_channel:
-            self.connections_by_channel[channel_id].discard(websocket)
-            if not self.connections_by_channel[channel_id]:
-                del self.connections_by_channel[channel_id]
+    def open_session(self, websocket: WebSocket, user_id: UUID, codec: GatewayCodec) -> GatewaySession:
+        session = GatewaySession(
+            session_id=secrets.token_urlsafe(16),
+            user_id=user_id,
+            codec=codec,
+            replay=deque(maxlen=self.replay_size),
+        )
+        self._attach(session, websocket, codec)
+        self.sessions[session.session_id] = session
+        self.sessions_by_user[user_id].add(session)
+        return session
 
-    async def broadcast(self, channel_id: UUID, event_type: str, data: dict[str, Any]) -> None:
-        payload = {"t": event_type, "d": data}
-        dead_connections: list[WebSocket] = []
+    async def resume_session(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        user_id: UUID,
+        seq: int,
+        codec: GatewayCodec,
+    ) -> GatewaySession | None:
+        session = self.sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            return None
+        # Events after the client's seq must still be buffered, otherwise it has a gap and must start over.
+        oldest = session.replay[0][0] if session.replay else session.seq + 1
+        if seq > session.seq or seq + 1 < oldest:
+            return None
 
-        for websocket in self.connections_by_channel.get(channel_id, set()):
+        if session.expiry is not None:
+            session.expiry.cancel()
+            session.expiry = None
+
+        async with session.lock:
+            # A client often reconnects before the server notices its old socket died; the new socket takes over.
+            stale = session.websocket
+            if stale is not None:
+                self._stop_sender(session)
+                self._close_socket(stale, 4409)
+            self._attach(session, websocket, codec)
+            for event_seq, event_type, data in list(session.replay):
+                if event_seq > seq:
+                    session.outbox.put_nowait(codec.encode_event(event_type, event_seq, ENCODERS[codec.encoding](data)))
+        return session
+
+    def _attach(self, session: GatewaySession, websocket: WebSocket, codec: GatewayCodec) -> None:
+        # Each socket gets its own queue and writer task, so a slow client only ever delays itself.
+        session.websocket = websocket
+        session.codec = codec
+        session.outbox = asyncio.Queue()
+        session.sender = asyncio.get_running_loop().create_task(self._send_loop(session, websocket, codec, session.outbox))
+
+    async def _send_loop(
+        self,
+        session: GatewaySession,
+        websocket: WebSocket,
+        codec: GatewayCodec,
+        outbox: asyncio.Queue[bytes],
+    ) -> None:
+        while True:
+            encoded = await outbox.get()
             try:
-                await websocket.send_json(payload)
+                await codec.send_encoded(websocket, encoded)
             except Exception:  # noqa: BLE001
-                dead_connections.append(websocket)
+                # Keep buffering for a dead socket so the client can still resume within the window.
+                metrics.inc("gateway_dead_socket_evictions_total")
+                self.detach(session, websocket)
+                return
+
+    def detach(self, session: GatewaySession, websocket: WebSocket) -> None:
+        if session.websocket is not websocket:
+            return
+        self._stop_sender(session)
+        self._schedule_expiry(session)
+
+    def _stop_sender(self, session: GatewaySession) -> None:
+        if session.sender is not None and session.sender is not asyncio.current_task():
+            session.sender.cancel()
+        session.websocket = session.outbox = session.sender = None
+
+    def _close_socket(self, websocket: WebSocket, code: int) -> None:
+        task = asyncio.get_running_loop().create_task(_close_quietly(websocket, code))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def close_session(self, session: GatewaySession) -> None:
+        self._stop_sender(session)
+        if session.expiry is not None:
+            session.expiry.cancel()
+        for server_id in list(session.servers):
+            self._leave_server(server_id, session)
+        for channel_id in list(session.channels):
+            self._unsubscribe(channel_id, session)
+        self.sessions.pop(session.session_id, None)
+        _discard(self.sessions_by_user, session.user_id, session)
+        rate_limiter.forget_connection(session.session_id)
+        for callback in self.on_session_closed:
+            callback(session)
+
+    def _schedule_expiry(self, session: GatewaySession) -> None:
+        session.expiry = asyncio.get_running_loop().call_later(self.resume_window, self.close_session, session)
+
+    async def subscribe(self, channel_id: UUID, session: GatewaySession, server_id: UUID) -> None:
+        self._subscribe(channel_id, session, server_id)
+
+    async def unsubscribe(self, channel_id: UUID, session: GatewaySession) -> None:
+        if self.server_by_channel.get(channel_id) not in session.servers:
+            self._unsubscribe(channel_id, session)
+
+    async def subscribe_server(self, server_id: UUID, session: GatewaySession, channel_ids: Iterable[UUID]) -> None:
+        session.servers.add(server_id)
+        self.sessions_by_server[server_id].add(session)
+        for channel_id in channel_ids:
+            self._subscribe(channel_id, session, server_id)
+
+    async def unsubscribe_server(self, server_id: UUID, session: GatewaySession) -> None:
+        self._leave_server(server_id, session)
+
+    def _subscribe(self, channel_id: UUID, session: GatewaySession, server_id: UUID) -> None:
+        self.server_by_channel[channel_id] = server_id
+        self.channels_by_server[server_id].add(channel_id)
+        self.sessions_by_channel[channel_id].add(session)
+        session.channels.add(channel_id)
+
+    def _unsubscribe(self, channel_id: UUID, session: GatewaySession) -> None:
+        session.channels.discard(channel_id)
+        if _discard(self.sessions_by_channel, channel_id, session):
+            server_id = self.server_by_channel.pop(channel_id, None)
+            if server_id is not None:
+                _discard(self.channels_by_server, server_id, channel_id)
+
+    def _leave_server(self, server_id: UUID, session: GatewaySession) -> None:
+        session.servers.discard(server_id)
+        _discard(self.sessions_by_server, server_id, session)
+        for channel_id in self.channels_by_server.get(server_id, set()) & session.channels:
+            self._unsubscribe(channel_id, session)
+
+    def add_channel(self, server_id: UUID, channel_id: UUID) -> None:
+        for session in self.sessions_by_server.get(server_id, ()):
+            self._subscribe(channel_id, session, server_id)
+
+    def drop_channel(self, channel_id: UUID) -> None:
+        for session in self.sessions_by_channel.pop(channel_id, ()):
+            session.channels.discard(channel_id)
+        server_id = self.server_by_channel.pop(channel_id, None)
+        if server_id is not None:
+            _discard(self.channels_by_server, server_id, channel_id)
+
+    def drop_server(self, server_id: UUID) -> None:
+        for session in self.sessions_by_server.pop(server_id, ()):
+            session.servers.discard(server_id)
+        for channel_id in self.channels_by_server.pop(server_id, ()):
+            for session in self.sessions_by_channel.pop(channel_id, ()):
+                session.channels.discard(channel_id)
+            self.server_by_channel.pop(channel_id, None)
+
+    def revoke(self, user_id: UUID, server_id: UUID) -> None:
+        for session in list(self.sessions_by_user.get(user_id, ())):
+            self._leave_server(server_id, session)
+
+    def sessions_for_server(self, server_id: UUID) -> set[GatewaySession]:
+        sessions = set(self.sessions_by_server.get(server_id, ()))
+        for channel_id in self.channels_by_server.get(server_id, ()):
+            sessions.update(self.sessions_by_channel.get(channel_id, ()))
+        return sessions
+
+    def sessions_for_user(self, user_id: UUID) -> set[GatewaySession]:
+        return set(self.sessions_by_user.get(user_id, ()))
+
+    async def publish(self, events: list[DomainEvent]) -> None:
+        for event in events:
+            if event.channel_id is not None:
+                await self.broadcast(event.channel_id, event.type, event.data)
+            elif event.server_id is not None:
+                if event.type == "CHANNEL_CREATE":
+                    self.add_channel(event.server_id, UUID(event.data["id"]))
+                await self.broadcast_to(self.sessions_for_server(event.server_id), event.type, event.data)
+                # Deletions unsubscribe only after the event went out, so the affected sockets still receive it.
+                if event.type == "CHANNEL_DELETE":
+                    self.drop_channel(UUID(event.data["id"]))
+                elif event.type == "SERVER_DELETE":
+                    self.drop_server(event.server_id)
+            elif event.user_id is not None:
+                await self.broadcast_to(self.sessions_for_user(event.user_id), event.type, event.data)
+
+    async def send(self, session: GatewaySession, event_type: str, data: dict[str, Any]) -> None:
+        self._deliver(session, event_type, data, {}, ephemeral=False)
+
+    async def broadcast(self, channel_id: UUID, event_type: str, data: dict[str, Any], ephemeral: bool = False) -> None:
+        await self.broadcast_to(list(self.sessions_by_channel.get(channel_id, ())), event_type, data, ephemeral)
+
+    async def broadcast_to(
+        self,
+        sessions: Iterable[GatewaySession],
+        event_type: str,
+        data: dict[str, Any],
+        ephemeral: bool = False,
+    ) -> None:
+        # Serialize ``d`` once per encoding; only the seq header and compression run per session.
+        encoded: dict[str, bytes] = {}
+        fanout = 0
+        started = time.perf_counter()
+        for session in sessions:
+            self._deliver(session, event_type, data, encoded, ephemeral)
+            fanout += 1
+        metrics.observe("gateway_broadcast_seconds", time.perf_counter() - started, event=event_type)
+        metrics.observe("gateway_broadcast_fanout", fanout, COUNT_BUCKETS, event=event_type)
+
+    def _deliver(
+        self,
+        session: GatewaySession,
+        event_type: str,
+        data: dict[str, Any],
+        encoded: dict[str, bytes],
+        ephemeral: bool,
+    ) -> None:
+        # Never awaits: the seq is assigned and the frame queued in one step, so per-session order follows call order.
+        # Ephemeral events go unsequenced: they are stale by the time a resume could replay them.
+        seq = None
+        if not ephemeral:
+            session.seq += 1
+            seq = session.seq
+            session.replay.append((seq, event_type, data))
+
+        websocket = session.websocket
+        if websocket is None:
+            return
+
+        codec = session.codec
+        if codec.encoding not in encoded:
+            encoded[codec.encoding] = ENCODERS[codec.encoding](data)
+        session.outbox.put_nowait(codec.encode_event(event_type, seq, encoded[codec.encoding]))
+        if session.outbox.qsize() > self.send_queue_size:
+            # The client resumes from the replay buffer instead of holding an ever-growing queue here.
+            metrics.inc("gateway_slow_consumer_evictions_total")
+            self.detach(session, websocket)
+            self._close_socket(websocket, 4408)
+
+    def collect_metrics(self) -> list[Sample]:
+        subscribers = [len(sessions) for sessions in self.sessions_by_channel.values()]
+        samples: list[Sample] = [
+            ("gateway_sessions", (), len(self.sessions)),
+            ("gateway_subscribed_servers", (), len(self.sessions_by_server)),
+            ("gateway_connected_sockets", (), sum(1 for session in self.sessions.values() if session.websocket is not None)),
+            ("gateway_subscribed_channels", (), len(subscribers)),
+            ("gateway_subscriptions", (), sum(subscribers)),
+            ("gateway_channel_subscribers_max", (), max(subscribers, default=0)),
+            (
+                "gateway_send_queue_max",
+                (),
+                max((session.outbox.qsize() for session in self.sessions.values() if session.outbox is not None), default=0),
+            ),
+        ]
+        samples += [
+            ("gateway_rate_limited_total", (("op", op), ("scope", scope)), count)
+            for (scope, op), count in rate_limiter.throttled.items()
+        ]
+        return samples
+
+
+async def _close_quietly(websocket: WebSocket, code: int) -> None:
+    try:
+        await websocket.close(code=code)
+    except Exception:  # noqa: BLE001
+        pass
+
 
-        for websocket in dead_connections:
-            self.connections_by_channel[channel_id].discard(websocket)
+def _discard(index: dict[Any, set[Any]], key: Any, value: Any) -> bool:
+    # Drops the key once its set is empty; returns whether it was dropped.
+    members = index.get(key)
+    if members is None:
+        return False
+    members.discard(value)
+    if members:
+        return False
+    del index[key]
+    return True
 
 
 manager = GatewayManager()
+metrics.collectors.append(manager.collect_metrics)
+event_bus.handlers.append(manager.publish)
+metrics.describe("gateway_sessions", "gauge", "Gateway sessions, including detached ones inside the resume window")
+metrics.describe("gateway_connected_sockets", "gauge", "Gateway sessions with a live websocket")
+metrics.describe("gateway_subscribed_servers", "gauge", "Servers with at least one server-level subscriber")
+metrics.describe("gateway_subscribed_channels", "gauge", "Channels with at least one subscribed session")
+metrics.describe("gateway_subscriptions", "gauge", "Channel subscriptions across all sessions")
+metrics.describe("gateway_channel_subscribers_max", "gauge", "Subscribers of the busiest channel")
+metrics.describe("gateway_rate_limited_total", "counter", "Gateway ops rejected by the rate limiter")
+metrics.describe("gateway_broadcast_seconds", "histogram", "Time to queue an event for every target session")
+metrics.describe("gateway_broadcast_fanout", "histogram", "Sessions targeted per broadcast")
+metrics.describe("gateway_dead_socket_evictions_total", "counter", "Sockets detached after a failed send")
+metrics.describe("gateway_slow_consumer_evictions_total", "counter", "Sockets closed for falling too far behind")
+metrics.describe("gateway_send_queue_max", "gauge", "Frames waiting in the longest per-socket send queue")
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import defaultdict
+from functools import cached_property
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.websocket.manager import GatewaySession, manager
+
+OFFLINE = "offline"
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+class TypingTracker:
+    def __init__(self) -> None:
+        self._typing: dict[tuple[UUID, UUID], tuple[float, asyncio.TimerHandle]] = {}
+
+    @cached_property
+    def timeout(self) -> float:
+        return get_settings().typing_timeout_seconds
+
+    @cached_property
+    def coalesce(self) -> float:
+        return get_settings().typing_coalesce_seconds
+
+    async def start(self, user_id: UUID, channel_id: UUID) -> None:
+        key = (user_id, channel_id)
+        now = time.monotonic()
+        loop = asyncio.get_running_loop()
+
+        current = self._typing.get(key)
+        if current is not None:
+            announced_at, expiry = current
+            expiry.cancel()
+            if now - announced_at < self.coalesce:
+                self._typing[key] = (announced_at, loop.call_later(self.timeout, self._expire, key))
+                return
+
+        self._typing[key] = (now, loop.call_later(self.timeout, self._expire, key))
+        await manager.broadcast(
+            channel_id,
+            "TYPING_START",
+            {"channel_id": str(channel_id), "user_id": str(user_id)},
+            ephemeral=True,
+        )
+
+    def stop(self, user_id: UUID, channel_id: UUID, announce: bool = False) -> None:
+        # A sent message ends typing on every client by itself; leaving the channel needs an explicit TYPING_STOP.
+        current = self._typing.pop((user_id, channel_id), None)
+        if current is None:
+            return
+        current[1].cancel()
+        if announce:
+            self._announce_stop(user_id, channel_id)
+
+    def _expire(self, key: tuple[UUID, UUID]) -> None:
+        if self._typing.pop(key, None) is not None:
+            self._announce_stop(*key)
+
+    def _announce_stop(self, user_id: UUID, channel_id: UUID) -> None:
+        _spawn(
+            manager.broadcast(
+                channel_id,
+                "TYPING_STOP",
+                {"channel_id": str(channel_id), "user_id": str(user_id)},
+                ephemeral=True,
+            )
+        )
+
+
+class PresenceTracker:
+    def __init__(self) -> None:
+        self.status_by_user: dict[UUID, str] = {}
+        self.servers_by_user: dict[UUID, set[UUID]] = {}
+        # Reverse index so a READY snapshot costs the members of the user's servers, not every tracked user.
+        self.users_by_server: dict[UUID, set[UUID]] = defaultdict(set)
+        self.sessions_by_user: dict[UUID, set[str]] = defaultdict(set)
+        self._pending: dict[UUID, dict[UUID, str]] = defaultdict(dict)
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    @cached_property
+    def flush_interval(self) -> float:
+        return get_settings().presence_flush_interval_ms / 1000
+
+    def connect(self, session: GatewaySession, server_ids: set[UUID]) -> None:
+        self.sessions_by_user[session.user_id].add(session.session_id)
+        self._index(session.user_id, server_ids)
+        if session.user_id not in self.status_by_user:
+            self.set_status(session.user_id, "online")
+
+    def snapshot(self, server_ids: set[UUID]) -> list[dict[str, str]]:
+        user_ids: set[UUID] = set()
+        for server_id in server_ids:
+            user_ids |= self.users_by_server.get(server_id, set())
+        presences = []
+        for user_id in user_ids:
+            status = self.status_by_user.get(user_id)
+            if status is not None and status != "invisible":
+                presences.append({"user_id": str(user_id), "status": status})
+        return presences
+
+    def session_closed(self, session: GatewaySession) -> None:
+        sessions = self.sessions_by_user.get(session.user_id)
+        if sessions is None:
+            return
+        sessions.discard(session.session_id)
+        if not sessions:
+            del self.sessions_by_user[session.user_id]
+            self.set_status(session.user_id, OFFLINE)
+            self.status_by_user.pop(session.user_id, None)
+            self._index(session.user_id, set())
+            del self.servers_by_user[session.user_id]
+
+    def _index(self, user_id: UUID, server_ids: set[UUID]) -> None:
+        previous = self.servers_by_user.get(user_id, set())
+        for server_id in previous - server_ids:
+            members = self.users_by_server[server_id]
+            members.discard(user_id)
+            if not members:
+                del self.users_by_server[server_id]
+        for server_id in server_ids - previous:
+            self.users_by_server[server_id].add(user_id)
+        self.servers_by_user[user_id] = server_ids
+
+    def set_status(self, user_id: UUID, status: str) -> None:
+        previous = self.status_by_user.get(user_id, OFFLINE)
+        self.status_by_user[user_id] = status
+        # Invisible users are reported as offline to everyone else.
+        visible = OFFLINE if status == "invisible" else status
+        if visible == (OFFLINE if previous == "invisible" else previous):
+            return
+
+        for server_id in self.servers_by_user.get(user_id, ()):
+            self._pending[server_id][user_id] = visible
+        if self._pending and self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, lambda: _spawn(self.flush()))
+
+    async def flush(self) -> None:
+        self._flush_handle = None
+        pending, self._pending = self._pending, defaultdict(dict)
+        for server_id, changes in pending.items():
+            sessions = manager.sessions_for_server(server_id)
+            if not sessions:
+                continue
+            presences = [{"user_id": str(user_id), "status": status} for user_id, status in changes.items()]
+            await manager.broadcast_to(
+                sessions,
+                "PRESENCE_UPDATE",
+                {"server_id": str(server_id), "presences": presences},
+                ephemeral=True,
+            )
+
+
+typing_tracker = TypingTracker()
+presence_tracker = PresenceTracker()
+manager.on_session_closed.append(presence_tracker.session_closed)
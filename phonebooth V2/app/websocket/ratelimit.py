@@ -0,0 +1,94 @@
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from functools import cached_property
+
+from app.core.config import get_settings
+
+
+@dataclass(slots=True)
+class TokenBucket:
+    capacity: float
+    rate: float
+    tokens: float
+    updated_at: float
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def retry_after(self) -> float:
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, limits: dict[str, tuple[int, float]], max_keys: int) -> None:
+        self.limits = limits
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[tuple[Hashable, str], TokenBucket] = OrderedDict()
+
+    def bucket(self, key: Hashable, op: str, now: float) -> TokenBucket | None:
+        limit = self.limits.get(op)
+        if limit is None:
+            return None
+
+        bucket = self._buckets.get((key, op))
+        if bucket is None:
+            burst, rate = limit
+            bucket = TokenBucket(capacity=burst, rate=rate, tokens=burst, updated_at=now)
+            self._buckets[(key, op)] = bucket
+            # Only a refilled bucket is safe to drop, since recreating it full gives nothing away; otherwise a client
+            # spread over enough keys would reset its own limits. If even the least recently used bucket is still
+            # refilling, the map runs over max_keys until it is full, at most burst / rate seconds later.
+            while len(self._buckets) > self.max_keys:
+                oldest = next(iter(self._buckets.values()))
+                oldest.refill(now)
+                if oldest.tokens < oldest.capacity:
+                    break
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((key, op))
+            bucket.refill(now)
+        return bucket
+
+    def forget(self, key: Hashable) -> None:
+        for op in self.limits:
+            self._buckets.pop((key, op), None)
+
+
+class GatewayRateLimiter:
+    def __init__(self) -> None:
+        self.throttled: Counter[tuple[str, str]] = Counter()
+
+    @cached_property
+    def scopes(self) -> dict[str, RateLimiter]:
+        settings = get_settings()
+        return {
+            "connection": RateLimiter(settings.gateway_connection_rate_limits, settings.gateway_rate_limit_max_keys),
+            "user": RateLimiter(settings.gateway_user_rate_limits, settings.gateway_rate_limit_max_keys),
+        }
+
+    def check(self, op: str, connection_key: Hashable, user_key: Hashable) -> tuple[str, float] | None:
+        now = time.monotonic()
+        buckets = [
+            (scope, self.scopes[scope].bucket(key, op, now))
+            for scope, key in (("connection", connection_key), ("user", user_key))
+        ]
+
+        # Nothing is spent unless every scope allows the op, so a throttled connection keeps its user budget.
+        for scope, bucket in buckets:
+            if bucket is not None and (retry_after := bucket.retry_after()) > 0:
+                self.throttled[(scope, op)] += 1
+                return scope, retry_after
+
+        for _, bucket in buckets:
+            if bucket is not None:
+                bucket.tokens -= 1
+        return None
+
+    def forget_connection(self, connection_key: Hashable) -> None:
+        self.scopes["connection"].forget(connection_key)
+
+
+rate_limiter = GatewayRateLimiter()
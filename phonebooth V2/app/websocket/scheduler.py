@@ -0,0 +1,54 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+import anyio
+
+
+class OpScheduler:
+    # Runs one connection's ops concurrently, up to ``limit`` at a time. Ops sharing a key run in arrival order:
+    # each waits for the previous op on its key, so a channel's sends commit in the order the client sent them.
+    # A barrier op waits for every op before it and every op after it waits for the barrier, whatever their keys.
+    def __init__(self, limit: int) -> None:
+        self._slots = asyncio.Semaphore(limit)
+        self._tails: dict[Hashable, asyncio.Task] = {}
+        self._barrier: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, handler: Callable[[], Awaitable[None]], barrier: bool = False) -> None:
+        # Blocks while every slot is taken, which stops the caller from reading more frames off the socket.
+        await self._slots.acquire()
+        if barrier:
+            previous = list(self._tails.values())
+            self._tails.clear()
+            if self._barrier is not None:
+                previous.append(self._barrier)
+        else:
+            tail = self._tails.get(key, self._barrier)
+            previous = [tail] if tail is not None else []
+        task = asyncio.create_task(self._run(previous, handler))
+        if barrier:
+            self._barrier = task
+        else:
+            self._tails[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finish(key, done))
+
+    async def _run(self, previous: list[asyncio.Task], handler: Callable[[], Awaitable[None]]) -> None:
+        if previous:
+            await asyncio.wait(previous)
+        await handler()
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        self._slots.release()
+        self._tasks.discard(task)
+        if self._barrier is task:
+            self._barrier = None
+        elif self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def drain(self) -> None:
+        # Ops already read run to completion even when the connection handler is cancelled, so every op's DB
+        # session closes normally; replies to a gone socket land in the replay buffer for a resume.
+        with anyio.CancelScope(shield=True):
+            while self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,54 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from sqlalchemy import text
+
+
+async def _first_query() -> None:
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("select 1"))
+
+
+def _child(import_only: bool) -> None:
+    started = time.perf_counter()
+    from app.main import app
+
+    imported = time.perf_counter()
+    sample = {"import": imported - started}
+    if not import_only:
+        from fastapi.testclient import TestClient
+
+        with TestClient(app) as client:
+            ready = time.perf_counter()
+            client.get("/health").raise_for_status()
+            served = time.perf_counter()
+            client.portal.call(_first_query)
+            queried = time.perf_counter()
+        sample |= {"startup": ready - imported, "first_request": served - started, "first_query": queried - served}
+    print(json.dumps(sample))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure app import time and time-to-first-request in fresh interpreters")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--import-only", action="store_true", help="skip startup, e.g. when the database is unreachable")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.import_only)
+        return
+
+    command = [sys.executable, "-m", "benchmarks.cold_start", "--child"] + (["--import-only"] if args.import_only else [])
+    samples = [json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout) for _ in range(args.runs)]
+    for key in samples[0]:
+        print(f"{key:>13}: {statistics.median(sample[key] for sample in samples) * 1000:7.1f} ms (median of {args.runs})")
+
+
+if __name__ == "__main__":
+    main()
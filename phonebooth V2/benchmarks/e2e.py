@@ -0,0 +1,363 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import websockets
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+SUPABASE_URL = "http://bench.local"
+KEY_ID = "bench"
+API = "/api/v1"
+
+
+class LocalIdentity:
+    def __init__(self) -> None:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        public_pem = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        public = jwk.construct(public_pem, "RS256").to_dict()
+        self.jwks = {"keys": [{**public, "kid": KEY_ID, "alg": "RS256", "use": "sig"}]}
+
+    def token(self, subject: uuid.UUID) -> str:
+        claims = {
+            "sub": str(subject),
+            "email": f"{subject.hex[:8]}@bench.local",
+            "aud": "authenticated",
+            "iss": f"{SUPABASE_URL}/auth/v1",
+            "exp": int(time.time()) + 3600,
+        }
+        return jwt.encode(claims, self.private_pem, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+def _serve_jwks(jwks: dict) -> tuple[ThreadingHTTPServer, str]:
+    body = json.dumps(jwks).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:  # noqa: ANN002
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/jwks.json"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentiles(samples: list[float]) -> dict[str, float | None]:
+    if len(samples) < 2:
+        value = round(samples[0], 3) if samples else None
+        return {"p50_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": round(cuts[49], 3), "p99_ms": round(cuts[98], 3)}
+
+
+async def _db_statements(client: httpx.AsyncClient) -> tuple[float, float]:
+    statements = requests = 0.0
+    for line in (await client.get("/metrics")).text.splitlines():
+        if 'route="/metrics"' in line:
+            continue
+        if line.startswith("http_request_db_statements_sum"):
+            statements += float(line.rsplit(" ", 1)[1])
+        elif line.startswith("http_request_db_statements_count"):
+            requests += float(line.rsplit(" ", 1)[1])
+    return statements, requests
+
+
+class Fixture:
+    def __init__(self, identity: LocalIdentity, users: int) -> None:
+        self.identity = identity
+        self.tokens = [identity.token(uuid.uuid4()) for _ in range(users)]
+        self.channel_id = ""
+        self.older_cursor: str | None = None
+
+    def headers(self, index: int) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[index % len(self.tokens)]}"}
+
+    async def build(self, client: httpx.AsyncClient, seed_messages: int) -> None:
+        owner = self.headers(0)
+        server = (await client.post(f"{API}/servers", json={"name": "bench"}, headers=owner)).json()
+        channel = (await client.post(f"{API}/servers/{server['id']}/channels", json={"name": "general"}, headers=owner)).json()
+        self.channel_id = channel["id"]
+
+        semaphore = asyncio.Semaphore(50)
+
+        async def resolve(index: int) -> str:
+            async with semaphore:
+                return (await client.get(f"{API}/me", headers=self.headers(index))).json()["id"]
+
+        user_ids = await asyncio.gather(*(resolve(index) for index in range(1, len(self.tokens))))
+        await _add_members(uuid.UUID(server["id"]), [uuid.UUID(user_id) for user_id in user_ids])
+
+        for index in range(seed_messages):
+            await client.post(f"{API}/channels/{self.channel_id}/messages", json={"content": f"seed {index}"}, headers=owner)
+        page = (await client.get(f"{API}/channels/{self.channel_id}/messages", headers=owner)).json()
+        self.older_cursor = page["before"]
+
+
+async def _create_schema() -> None:
+    from app.db.base import Base
+    from app.db.session import dispose_engine, get_engine
+
+    import app.models  # noqa: F401
+
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await dispose_engine()
+
+
+async def _add_members(server_id: uuid.UUID, user_ids: list[uuid.UUID]) -> None:
+    from sqlalchemy import insert
+
+    from app.db.session import AsyncSessionLocal, dispose_engine
+    from app.models import ServerMember
+
+    if user_ids:
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(ServerMember), [{"server_id": server_id, "user_id": user_id} for user_id in user_ids])
+            await db.commit()
+    await dispose_engine()
+
+
+Op = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+def _rest_ops(fixture: Fixture) -> dict[str, Op]:
+    messages = f"{API}/channels/{fixture.channel_id}/messages"
+
+    async def read_latest(client: httpx.AsyncClient, user: int) -> httpx.Response:
+        return await client.get(messages, headers=fixture.headers(user))
+
+    async def read_older(client: httpx.AsyncClient, user: int) -> httpx.Response:
+        return await client.get(messages, params={"before": fixture.older_cursor}, headers=fixture.headers(user))
+
+    async def create(client: httpx.AsyncClient, user: int) -> httpx.Response:
+        return await client.post(messages, json={"content": f"bench {user} {time.perf_counter_ns()}"}, headers=fixture.headers(user))
+
+    return {"read_latest": read_latest, "read_older": read_older, "create": create}
+
+
+REST_SCENARIOS: dict[str, dict[str, float]] = {
+    "history": {"read_latest": 0.7, "read_older": 0.3},
+    "create": {"create": 1.0},
+    "mixed": {"read_latest": 0.6, "read_older": 0.25, "create": 0.15},
+}
+
+
+async def _run_rest(name: str, client: httpx.AsyncClient, fixture: Fixture, clients: int, requests: int) -> dict:
+    ops = _rest_ops(fixture)
+    mix = REST_SCENARIOS[name]
+    names, weights = list(mix), list(mix.values())
+    latencies: dict[str, list[float]] = {op: [] for op in names}
+    errors = 0
+    remaining = requests
+
+    async def virtual_user(user: int) -> None:
+        nonlocal remaining, errors
+        rng = random.Random(user)
+        while remaining > 0:
+            remaining -= 1
+            op = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await ops[op](client, user)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies[op].append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    statements_before, requests_before = await _db_statements(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(user) for user in range(clients)))
+    elapsed = time.perf_counter() - started
+    statements_after, requests_after = await _db_statements(client)
+
+    completed = [sample for samples in latencies.values() for sample in samples]
+    served = requests_after - requests_before
+    return {
+        "scenario": name,
+        "clients": clients,
+        "requests": requests,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(completed) / elapsed, 1),
+        **_percentiles(completed),
+        "db_statements_per_request": round((statements_after - statements_before) / served, 2) if served else None,
+        "ops": {op: {"count": len(samples), **_percentiles(samples)} for op, samples in latencies.items()},
+    }
+
+
+async def _run_gateway(base_url: str, fixture: Fixture, sockets: int, broadcasts: int) -> dict:
+    ws_url = base_url.replace("http://", "ws://") + "/gateway"
+    join_latencies: list[float] = []
+    delivery_latencies: list[float] = []
+    delivered = asyncio.Event()
+    ready = asyncio.Semaphore(100)
+    connections: list = []
+
+    join_errors = 0
+
+    async def listener(index: int) -> None:
+        nonlocal join_errors
+        async with ready:
+            started = time.perf_counter()
+            try:
+                connection = await websockets.connect(f"{ws_url}?token={fixture.tokens[index % len(fixture.tokens)]}", max_size=None)
+                await connection.recv()
+                await connection.send(json.dumps({"op": "join_channel", "d": {"channel_id": fixture.channel_id}}))
+                while json.loads(await connection.recv())["t"] != "CHANNEL_JOINED":
+                    pass
+            except (OSError, websockets.WebSocketException):
+                join_errors += 1
+                return
+            join_latencies.append((time.perf_counter() - started) * 1000)
+        connections.append(connection)
+
+    async def drain(connection) -> None:  # noqa: ANN001
+        async for frame in connection:
+            event = json.loads(frame)
+            if event["t"] == "MESSAGE_CREATE" and event["d"]["content"].startswith("gw "):
+                delivery_latencies.append((time.perf_counter_ns() - int(event["d"]["content"][3:])) / 1_000_000)
+                if len(delivery_latencies) >= expected:
+                    delivered.set()
+
+    await asyncio.gather(*(listener(index) for index in range(sockets)))
+    if not connections:
+        return {"scenario": "gateway", "sockets": sockets, "join_errors": join_errors}
+    expected = len(connections) * broadcasts
+    readers = [asyncio.create_task(drain(connection)) for connection in connections]
+
+    sender = connections[0]
+    started = time.perf_counter()
+    for _ in range(broadcasts):
+        await sender.send(json.dumps({"op": "send_message", "d": {"channel_id": fixture.channel_id, "content": f"gw {time.perf_counter_ns()}"}}))
+    try:
+        await asyncio.wait_for(delivered.wait(), timeout=max(30.0, broadcasts * sockets / 1000))
+    except TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+
+    for reader in readers:
+        reader.cancel()
+    await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+    return {
+        "scenario": "gateway",
+        "sockets": sockets,
+        "join_errors": join_errors,
+        "broadcasts": broadcasts,
+        "deliveries": len(delivery_latencies),
+        "missed": expected - len(delivery_latencies),
+        "duration_s": round(elapsed, 3),
+        "throughput_deliveries_per_s": round(len(delivery_latencies) / elapsed, 1),
+        "join": _percentiles(join_latencies),
+        **_percentiles(delivery_latencies),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Boot app.main:app under uvicorn against a local database and drive REST and gateway load"
+    )
+    parser.add_argument(
+        "--db-url",
+        default="sqlite+aiosqlite:///bench_e2e.db",
+        help="the SQLite default needs the bench extra (pip install -e '.[bench]'); use a local Postgres for realistic numbers",
+    )
+    parser.add_argument("--scenarios", default="history,create,mixed,gateway")
+    parser.add_argument("--clients", type=int, default=200, help="concurrent REST virtual users")
+    parser.add_argument("--requests", type=int, default=5000, help="REST requests per scenario")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--broadcasts", type=int, default=20)
+    parser.add_argument("--seed-messages", type=int, default=200)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.db_url.startswith("sqlite") and os.path.exists(path := args.db_url.split("///", 1)[1]):
+        os.remove(path)
+
+    identity = LocalIdentity()
+    jwks_server, jwks_url = _serve_jwks(identity.jwks)
+    port = _free_port()
+    # Rate limits are disabled so the report measures the server, not the configured budgets.
+    env = os.environ | {
+        "SUPABASE_URL": SUPABASE_URL,
+        "SUPABASE_DB_URL": args.db_url,
+        "SUPABASE_JWKS_URL": jwks_url,
+        "GATEWAY_CONNECTION_RATE_LIMITS": "{}",
+        "GATEWAY_USER_RATE_LIMITS": "{}",
+    }
+    os.environ.update(env)
+    await _create_schema()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    report: dict = {"db_url": args.db_url.split("@")[-1], "scenarios": []}
+    try:
+        limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+            for _ in range(200):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.05)
+            else:
+                raise SystemExit("API did not start")
+
+            fixture = Fixture(identity, max(args.users, 2))
+            await fixture.build(client, args.seed_messages)
+            for name in args.scenarios.split(","):
+                if name == "gateway":
+                    result = await _run_gateway(base_url, fixture, args.sockets, args.broadcasts)
+                else:
+                    result = await _run_rest(name, client, fixture, args.clients, args.requests)
+                report["scenarios"].append(result)
+                print(f"{name:>8}: {json.dumps({k: v for k, v in result.items() if k != 'ops'})}", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+        jwks_server.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import argparse
+import time
+import uuid
+from datetime import UTC, datetime
+
+from app.schemas.message import CreateMessageIn, MessageOut
+from app.schemas.ws import gateway_op_adapter
+from app.websocket.codec import GatewayCodec
+
+
+def _event(index: int) -> dict:
+    message = MessageOut(
+        id=uuid.uuid4(),
+        channel_id=uuid.uuid4(),
+        author_id=uuid.uuid4(),
+        content=f"hey, are we still on for tonight? message {index}",
+        created_at=datetime.now(UTC),
+        edited_at=None,
+    )
+    return {"t": "MESSAGE_CREATE", "d": message.model_dump(mode="json")}
+
+
+def _outbound(encoding: str, compress: str | None, events: list[dict]) -> tuple[float, float]:
+    codec = GatewayCodec(encoding=encoding, compress=compress)
+    total = 0
+    started = time.process_time()
+    for event in events:
+        total += len(codec.frame(codec.encode(event)))
+    elapsed = time.process_time() - started
+    return total / len(events), elapsed / len(events) * 1_000_000
+
+
+def _inbound(count: int) -> tuple[float, float]:
+    raw = {"op": "send_message", "d": {"channel_id": str(uuid.uuid4()), "content": "hello there"}}
+
+    started = time.process_time()
+    for _ in range(count):
+        # Previous path: a generic envelope, a manual UUID parse, then CreateMessageIn.
+        envelope = {"op": raw["op"], "d": dict(raw["d"])}
+        uuid.UUID(str(envelope["d"].get("channel_id")))
+        CreateMessageIn.model_validate({"content": envelope["d"].get("content")})
+    two_step = time.process_time() - started
+
+    started = time.process_time()
+    for _ in range(count):
+        gateway_op_adapter.validate_python(raw)
+    union = time.process_time() - started
+    return two_step / count * 1_000_000, union / count * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bytes and CPU per gateway event for each negotiated transport")
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    events = [_event(index) for index in range(args.events)]
+    for encoding in ("json", "msgpack"):
+        for compress in (None, "zlib-stream"):
+            size, cpu = _outbound(encoding, compress, events)
+            label = f"{encoding}+{compress}" if compress else encoding
+            print(f"{label:<20} {size:7.1f} bytes/event {cpu:7.2f} us/event")
+
+    two_step, union = _inbound(args.events)
+    print(f"inbound two-step validation   {two_step:7.2f} us/op")
+    print(f"inbound discriminated union   {union:7.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import time
+import uuid
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.serialization import columns_for, encode_json
+from app.db.session import AsyncSessionLocal, dispose_engine
+from app.models import Message
+from app.schemas.message import MessageOut
+from benchmarks.message_insert import _fixture
+
+_message_list = TypeAdapter(list[MessageOut])
+
+
+async def _entities(channel_id: uuid.UUID, limit: int) -> bytes:
+    async with AsyncSessionLocal() as db:
+        stmt = select(Message).where(Message.channel_id == channel_id).order_by(Message.created_at.desc()).limit(limit)
+        rows = (await db.execute(stmt)).scalars().all()
+        # Mirrors the old path: model_validate per row, then response_model validation and encoding.
+        items = [MessageOut.model_validate(item, from_attributes=True) for item in rows]
+        return _message_list.dump_json(_message_list.validate_python(items))
+
+
+async def _projected(channel_id: uuid.UUID, limit: int) -> bytes:
+    async with AsyncSessionLocal() as db:
+        stmt = (
+            select(*columns_for(Message, MessageOut))
+            .where(Message.channel_id == channel_id)
+            .order_by(Message.created_at.desc())
+            .limit(limit)
+        )
+        return encode_json([row._asdict() for row in await db.execute(stmt)])
+
+
+async def _measure(fn, channel_id: uuid.UUID, limit: int, iterations: int) -> float:
+    await fn(channel_id, limit)
+    started = time.process_time()
+    for _ in range(iterations):
+        await fn(channel_id, limit)
+    return (time.process_time() - started) / iterations * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU per list request: ORM entities + model_validate vs projection + orjson")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    author_id, channel_id = await _fixture()
+    async with AsyncSessionLocal() as db:
+        db.add_all(Message(channel_id=channel_id, author_id=author_id, content=f"bench {i}" * 8) for i in range(args.limit))
+        await db.commit()
+
+    before = await _measure(_entities, channel_id, args.limit, args.iterations)
+    after = await _measure(_projected, channel_id, args.limit, args.iterations)
+    print(f"entities + model_validate: {before:.3f} ms CPU/request")
+    print(f"projection + orjson:       {after:.3f} ms CPU/request")
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
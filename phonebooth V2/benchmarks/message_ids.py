@@ -0,0 +1,108 @@
+import argparse
+import asyncio
+import time
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, MetaData, Table, Text, insert, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.ids import id_generator, id_timestamp
+from app.db.session import dispose_engine, get_engine
+
+# 2024-01-01T00:00:00Z; a classic snowflake keeps 41 bits of milliseconds after a custom epoch.
+SNOWFLAKE_EPOCH_MS = 1_704_067_200_000
+
+
+def _snowflake_int() -> int:
+    # The same generator's fields repacked into 64 bits, to size what a bigint key would save over a uuid column.
+    value = id_generator.next_id().int
+    return ((value >> 80) - SNOWFLAKE_EPOCH_MS) << 22 | id_generator.worker_id << 12 | (value >> 64) & 0xFFF
+
+
+KEYS: dict[str, tuple[Any, Callable[[], Any]]] = {
+    "uuid4": (UUID(as_uuid=True), uuid.uuid4),
+    "uuid_snowflake": (UUID(as_uuid=True), id_generator.next_id),
+    "bigint_snowflake": (BigInteger(), _snowflake_int),
+}
+
+
+def _table(metadata: MetaData, name: str, key_type: Any) -> Table:
+    table = Table(
+        f"bench_ids_{name}",
+        metadata,
+        Column("id", key_type, primary_key=True),
+        Column("channel_id", UUID(as_uuid=True), nullable=False),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Column("content", Text, nullable=False),
+    )
+    Index(f"bench_ids_{name}_channel_id", table.c.channel_id, table.c.id)
+    return table
+
+
+async def _index_bytes(conn: AsyncConnection, table: Table) -> int | None:
+    if conn.dialect.name == "postgresql":
+        return (await conn.execute(text("select pg_indexes_size(:name)"), {"name": table.name})).scalar()
+    try:
+        stmt = text("select sum(pgsize) from dbstat where name in (select name from sqlite_master where tbl_name = :name and type = 'index')")
+        return (await conn.execute(stmt, {"name": table.name})).scalar()
+    except Exception:  # noqa: BLE001
+        return None
+
+
+async def _run(name: str, table: Table, make_id: Callable[[], Any], rows: int, batch: int, channels: list[uuid.UUID]) -> None:
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(table.drop, checkfirst=True)
+        await conn.run_sync(table.create)
+
+    elapsed = 0.0
+    for offset in range(0, rows, batch):
+        values = []
+        for i in range(offset, min(offset + batch, rows)):
+            message_id = make_id()
+            created_at = id_timestamp(message_id) if isinstance(message_id, uuid.UUID) else None
+            values.append(
+                {
+                    "id": message_id,
+                    "channel_id": channels[i % len(channels)],
+                    "created_at": created_at or datetime.now(UTC),
+                    "content": f"bench {i}",
+                }
+            )
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), values)
+        elapsed += time.perf_counter() - started
+
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text(f"analyze {table.name}"))
+        size = await _index_bytes(conn, table)
+        await conn.run_sync(table.drop)
+
+    size_label = f"{size / 1024 / 1024:,.1f} MiB" if size is not None else "n/a"
+    print(f"{name:<17} {rows / elapsed:>10,.0f} rows/s   indexes {size_label}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Insert throughput and index size of uuid4 vs time-ordered message keys")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--keys", nargs="+", choices=list(KEYS), default=list(KEYS))
+    args = parser.parse_args()
+
+    metadata = MetaData()
+    channels = [uuid.uuid4() for _ in range(args.channels)]
+    for name in args.keys:
+        key_type, make_id = KEYS[name]
+        await _run(name, _table(metadata, name, key_type), make_id, args.rows, args.batch, channels)
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, dispose_engine, get_engine
+from app.models import Channel, Server, User
+from app.services.message_pipeline import MessageIngestPipeline
+from app.services.message_service import create_message
+
+
+async def _fixture() -> tuple[uuid.UUID, uuid.UUID]:
+    async with get_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        user = User(supabase_user_id=uuid.uuid4(), username="bench")
+        db.add(user)
+        await db.flush()
+        server = Server(name="bench", owner_id=user.id)
+        db.add(server)
+        await db.flush()
+        channel = Channel(server_id=server.id, name="bench")
+        db.add(channel)
+        await db.commit()
+        return user.id, channel.id
+
+
+async def _per_message(channel_id: uuid.UUID, author_id: uuid.UUID, total: int, clients: int) -> float:
+    async def client(count: int) -> None:
+        async with AsyncSessionLocal() as db:
+            for i in range(count):
+                await create_message(db, channel_id, author_id, f"bench {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(total // clients) for _ in range(clients)))
+    return time.perf_counter() - started
+
+
+async def _pipelined(channel_id: uuid.UUID, author_id: uuid.UUID, total: int, clients: int, window_ms: float) -> float:
+    pipeline = MessageIngestPipeline(AsyncSessionLocal, window_ms=window_ms, max_batch=500)
+
+    async def client(count: int) -> None:
+        for i in range(count):
+            await pipeline.submit(channel_id, author_id, f"bench {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(total // clients) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    await pipeline.close()
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare per-message inserts with the batched ingest pipeline")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    author_id, channel_id = await _fixture()
+    baseline = await _per_message(channel_id, author_id, args.messages, args.clients)
+    batched = await _pipelined(channel_id, author_id, args.messages, args.clients, args.window_ms)
+
+    print(f"per-message: {args.messages / baseline:,.0f} msg/s ({baseline:.2f}s)")
+    print(f"pipelined:   {args.messages / batched:,.0f} msg/s ({batched:.2f}s)")
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import UTC, datetime
+
+from sqlalchemy import insert
+
+from app.db.session import AsyncSessionLocal, dispose_engine
+from app.models import Message
+from app.services.search_service import search_messages
+from benchmarks.message_insert import _fixture
+
+WORDS = (
+    "hello world pizza tonight call later meeting game stream music movie friday weekend lunch coffee "
+    "deploy review merge branch release ticket bug fix server channel voice invite link photo"
+).split()
+QUERIES = ["pizza", "release ticket", "weekend movie", "deploy", "coffee lunch friday"]
+
+
+async def _populate(channel_id, author_id, rows: int, batch: int = 10_000) -> None:
+    rng = random.Random(42)
+    async with AsyncSessionLocal() as db:
+        for start in range(0, rows, batch):
+            values = [
+                {
+                    "channel_id": channel_id,
+                    "author_id": author_id,
+                    "content": " ".join(rng.choices(WORDS, k=rng.randint(3, 16))),
+                    "created_at": datetime.now(UTC),
+                }
+                for _ in range(min(batch, rows - start))
+            ]
+            await db.execute(insert(Message), values)
+            await db.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Full-text message search latency")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    author_id, channel_id = await _fixture()
+    started = time.perf_counter()
+    await _populate(channel_id, author_id, args.rows)
+    print(f"populated {args.rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    async with AsyncSessionLocal() as db:
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                await search_messages(db, query, 25, 0, channel_id=channel_id)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            print(f"{query!r:<24} p50 {statistics.median(samples):8.2f} ms  p99 {p99:8.2f} ms")
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
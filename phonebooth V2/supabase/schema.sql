@@ -32,16 +32,96 @@ create table if not exists public.channels (
   name varchar(80) not null,
   channel_type varchar(20) not null default 'text',
   position integer not null default 0,
-  created_at timestamptz not null default now()
+  created_at timestamptz not null default now(),
+  last_message_id uuid,
+  last_message_at timestamptz,
+  message_count bigint not null default 0
 );
 
+alter table public.channels add column if not exists last_message_id uuid;
+alter table public.channels add column if not exists last_message_at timestamptz;
+alter table public.channels add column if not exists message_count bigint not null default 0;
+
+-- Range-partitioned by month on created_at. Monthly partitions are created ahead of time and rolled into the
+-- cold archive by `python -m app.db.partitions ensure|archive`; the default partition catches anything unplanned,
+-- and `ensure` moves such rows into their month's partition when it creates it.
+-- Existing unpartitioned installs: rename the old table, create this one, attach the old table as a partition
+-- covering its date range (or copy rows over), then recreate the indexes below.
 create table if not exists public.messages (
-  id uuid primary key default gen_random_uuid(),
+  id uuid not null default gen_random_uuid(),
   channel_id uuid not null references public.channels(id) on delete cascade,
   author_id uuid not null references public.users(id) on delete cascade,
   content text not null,
   created_at timestamptz not null default now(),
-  edited_at timestamptz
+  edited_at timestamptz,
+  primary key (id, created_at)
+) partition by range (created_at);
+
+-- The current and next month exist before the default partition, so new rows never start out in the default.
+do $$
+declare
+  month_start date := date_trunc('month', now())::date;
+begin
+  for i in 0..1 loop
+    execute format(
+      'create table if not exists public.%I partition of public.messages for values from (%L) to (%L)',
+      'messages_p' || to_char(month_start + make_interval(months => i), 'YYYYMM'),
+      (month_start + make_interval(months => i))::date,
+      (month_start + make_interval(months => i + 1))::date
+    );
+  end loop;
+end $$;
+
+create table if not exists public.messages_default partition of public.messages default;
+
+-- Per-user read markers. unread = channels.message_count - read_count, so acks and reads never COUNT(*) history.
+create table if not exists public.read_states (
+  user_id uuid not null references public.users(id) on delete cascade,
+  channel_id uuid not null references public.channels(id) on delete cascade,
+  last_read_message_id uuid,
+  last_read_at timestamptz,
+  read_count bigint not null default 0,
+  primary key (user_id, channel_id)
+);
+
+-- Client nonces for idempotent sends; kept apart from messages so uniqueness does not depend on created_at.
+-- Rows go away with their channel or server (cascade) and with their month when the archive job moves it out.
+create table if not exists public.message_nonces (
+  author_id uuid not null references public.users(id) on delete cascade,
+  channel_id uuid not null references public.channels(id) on delete cascade,
+  nonce varchar(64) not null,
+  message_id uuid not null,
+  message_created_at timestamptz not null,
+  primary key (author_id, channel_id, nonce)
+);
+
+-- Attachment metadata; the bytes live in the content-addressed store under their sha256, shared by identical uploads.
+create table if not exists public.attachments (
+  id uuid primary key default gen_random_uuid(),
+  message_id uuid not null,
+  channel_id uuid not null references public.channels(id) on delete cascade,
+  uploader_id uuid not null references public.users(id) on delete cascade,
+  filename varchar(255) not null,
+  content_type varchar(255) not null,
+  size bigint not null,
+  sha256 varchar(64) not null,
+  created_at timestamptz not null default now()
+);
+
+-- Bulk server/channel deletions run in the background; rows let any worker report progress and resume a job whose
+-- worker stopped heartbeating. The partial unique index keeps one unfinished job per target.
+create table if not exists public.deletion_jobs (
+  id uuid primary key default gen_random_uuid(),
+  kind varchar(10) not null,
+  target_id uuid not null,
+  requested_by uuid not null references public.users(id) on delete cascade,
+  status varchar(10) not null default 'pending',
+  total_messages bigint not null,
+  deleted_messages bigint not null default 0,
+  error text,
+  created_at timestamptz not null default now(),
+  finished_at timestamptz,
+  heartbeat_at timestamptz not null default now()
 );
 
 create index if not exists idx_users_supabase_user_id on public.users(supabase_user_id);
@@ -49,8 +129,22 @@ create index if not exists idx_servers_owner_id on public.servers(owner_id);
 create index if not exists idx_server_members_server_id on public.server_members(server_id);
 create index if not exists idx_server_members_user_id on public.server_members(user_id);
 create index if not exists idx_channels_server_id on public.channels(server_id);
-create index if not exists idx_messages_channel_id on public.messages(channel_id);
+-- Keyset pagination over (created_at, id) per channel; supersedes the plain channel_id index.
+drop index if exists public.idx_messages_channel_id;
+create index if not exists idx_messages_channel_created_id on public.messages(channel_id, created_at desc, id desc);
 create index if not exists idx_messages_author_id on public.messages(author_id);
+create index if not exists idx_read_states_channel_id on public.read_states(channel_id);
+create index if not exists idx_message_nonces_message_created_at on public.message_nonces(message_created_at);
+create index if not exists idx_attachments_message_id on public.attachments(message_id);
+create index if not exists idx_attachments_channel_id on public.attachments(channel_id);
+create index if not exists idx_attachments_sha256 on public.attachments(sha256);
+create unique index if not exists uq_deletion_jobs_active_target
+  on public.deletion_jobs(target_id) where status in ('pending', 'running');
+create index if not exists idx_deletion_jobs_finished_at on public.deletion_jobs(finished_at);
+
+-- Full-text search; the expression must match the one in app/models/message.py for the planner to use it.
+create index if not exists idx_messages_content_fts
+  on public.messages using gin (to_tsvector('simple'::regconfig, content));
 
 -- Optional RLS defaults if your frontend also reads directly from Supabase.
 -- The FastAPI backend should connect with service role or DB credentials and can bypass RLS as needed.
@@ -59,6 +153,10 @@ alter table public.servers enable row level security;
 alter table public.server_members enable row level security;
 alter table public.channels enable row level security;
 alter table public.messages enable row level security;
+alter table public.read_states enable row level security;
+alter table public.message_nonces enable row level security;
+alter table public.attachments enable row level security;
+alter table public.deletion_jobs enable row level security;
 
 create policy if not exists users_self_read on public.users
 for select using (supabase_user_id = auth.uid());
@@ -98,6 +196,11 @@ for select using (
   )
 );
 
+create policy if not exists read_states_self_read on public.read_states
+for select using (
+  exists (select 1 from public.users u where u.id = read_states.user_id and u.supabase_user_id = auth.uid())
+);
+
 -- Discord bot config and call state tables
 create table if not exists public.guild_bot_configs (
   guild_id bigint primary key,
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+# Settings are read lazily, but app.main reads them at import; give it something to read before any test imports it.
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_JWKS_URL", "http://127.0.0.1:9/jwks")
+os.environ.setdefault("SUPABASE_DB_URL", "sqlite+aiosqlite://")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.config import get_settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import dispose_engine, get_engine, get_replica_engine  # noqa: E402
+
+
+def sqlite_url(path: Path) -> str:
+    return f"sqlite+aiosqlite:///{path}"
+
+
+async def create_schema() -> None:
+    # Runs on its own event loop before the app starts, so the engines are disposed rather than carried over.
+    for engine in (get_engine(), get_replica_engine()):
+        if engine is not None:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+    await dispose_engine()
+
+
+async def fake_verify(token: str) -> dict[str, str]:
+    return {"sub": token, "email": f"{token[:8]}@example.com"}
+
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory: pytest.TempPathFactory) -> Iterator[TestClient]:
+    # One app and one event loop for the whole run: the module singletons (event bus, gateway) bind to the loop they
+    # first run on. Tests stay independent by creating their own users, servers and channels.
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("SUPABASE_DB_URL", sqlite_url(tmp_path_factory.mktemp("db") / "primary.db"))
+        monkeypatch.delenv("SUPABASE_DB_REPLICA_URL", raising=False)
+        monkeypatch.setattr("app.api.deps.verify_supabase_jwt", fake_verify)
+        get_settings.cache_clear()
+        from app.main import app
+
+        asyncio.run(create_schema())
+        with TestClient(app) as test_client:
+            yield test_client
+    get_settings.cache_clear()
+
+
+def auth(user: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {user}"}
+
+
+def new_user() -> str:
+    return str(uuid.uuid4())
+
+
+def create_channel(client: TestClient, user: str) -> tuple[str, str]:
+    server = client.post("/api/v1/servers", json={"name": "srv"}, headers=auth(user)).json()
+    channel = client.post(f"/api/v1/servers/{server['id']}/channels", json={"name": "general"}, headers=auth(user)).json()
+    return server["id"], channel["id"]
+
+
+def post_message(client: TestClient, user: str, channel_id: str, content: str) -> str:
+    response = client.post(f"/api/v1/channels/{channel_id}/messages", json={"content": content}, headers=auth(user))
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def add_member(client: TestClient, server_id: str, user: str) -> None:
+    # There is no invite flow yet; membership rows are written directly.
+    from app.db.session import AsyncSessionLocal
+    from app.models import ServerMember
+
+    user_id = uuid.UUID(client.get("/api/v1/me", headers=auth(user)).json()["id"])
+
+    async def add() -> None:
+        async with AsyncSessionLocal() as db:
+            db.add(ServerMember(server_id=uuid.UUID(server_id), user_id=user_id))
+            await db.commit()
+
+    client.portal.call(add)
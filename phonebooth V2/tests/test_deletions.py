@@ -0,0 +1,97 @@
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models import DeletionJob
+from app.services.deletion_service import bulk_deleter
+from tests.conftest import auth, create_channel, new_user, post_message
+
+
+@pytest.fixture(autouse=True)
+def background_deletes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(get_settings(), "bulk_delete_inline_max_messages", 1)
+
+
+def _wait(client: TestClient, user: str, job_id: str) -> dict:
+    deadline = time.monotonic() + 10
+    while True:
+        job = client.get(f"/api/v1/deletions/{job_id}", headers=auth(user)).json()
+        if job["status"] not in ("pending", "running") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.02)
+
+
+def _channel_with_messages(client: TestClient, user: str) -> str:
+    _, channel_id = create_channel(client, user)
+    for i in range(3):
+        post_message(client, user, channel_id, f"m{i}")
+    return channel_id
+
+
+def test_background_delete_reports_progress_from_the_database(client: TestClient) -> None:
+    user = new_user()
+    channel_id = _channel_with_messages(client, user)
+
+    response = client.delete(f"/api/v1/channels/{channel_id}", headers=auth(user))
+    assert response.status_code == 202, response.text
+    job = _wait(client, user, response.json()["id"])
+    assert (job["status"], job["deleted_messages"]) == ("done", 3)
+    assert client.get(f"/api/v1/deletions/{job['id']}", headers=auth(new_user())).status_code == 404
+
+    async def stored() -> DeletionJob:
+        async with AsyncSessionLocal() as db:
+            return await db.get(DeletionJob, uuid.UUID(job["id"]))
+
+    assert client.portal.call(stored).status == "done"
+
+
+def test_cancelled_job_fails_and_does_not_block_a_retry(client: TestClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    user = new_user()
+    channel_id = _channel_with_messages(client, user)
+
+    async def hang(*args: object) -> None:
+        await asyncio.Event().wait()
+
+    with monkeypatch.context() as patched:
+        patched.setattr(bulk_deleter, "_delete_messages", hang)
+        first = client.delete(f"/api/v1/channels/{channel_id}", headers=auth(user)).json()
+        client.portal.call(bulk_deleter.close)
+
+    job = client.get(f"/api/v1/deletions/{first['id']}", headers=auth(user)).json()
+    assert job["status"] == "failed" and job["error"], job
+
+    retry = client.delete(f"/api/v1/channels/{channel_id}", headers=auth(user))
+    assert retry.status_code == 202 and retry.json()["id"] != first["id"]
+    assert _wait(client, user, retry.json()["id"])["status"] == "done"
+
+
+def test_stale_job_is_taken_over(client: TestClient) -> None:
+    user = new_user()
+    channel_id = _channel_with_messages(client, user)
+    user_id = uuid.UUID(client.get("/api/v1/me", headers=auth(user)).json()["id"])
+
+    # A job left running by a worker that died: its heartbeat stopped long ago.
+    async def orphan() -> uuid.UUID:
+        async with AsyncSessionLocal() as db:
+            job = DeletionJob(
+                kind="channel",
+                target_id=uuid.UUID(channel_id),
+                requested_by=user_id,
+                total_messages=3,
+                status="running",
+                heartbeat_at=datetime.now(UTC) - timedelta(hours=1),
+            )
+            db.add(job)
+            await db.commit()
+            return job.id
+
+    job_id = client.portal.call(orphan)
+    response = client.delete(f"/api/v1/channels/{channel_id}", headers=auth(user))
+    assert response.json()["id"] == str(job_id)
+    assert _wait(client, user, str(job_id))["status"] == "done"
@@ -0,0 +1,55 @@
+from fastapi.testclient import TestClient
+
+from tests.conftest import add_member, create_channel, new_user
+
+
+def _receive(ws, event_type: str) -> dict:  # noqa: ANN001
+    while True:
+        frame = ws.receive_json()
+        if frame["t"] == event_type:
+            return frame["d"]
+
+
+def test_ready_presences_cover_only_shared_servers(client: TestClient) -> None:
+    alice, bob, carol = new_user(), new_user(), new_user()
+    server_id, _ = create_channel(client, alice)
+    add_member(client, server_id, bob)
+    create_channel(client, carol)
+
+    with client.websocket_connect(f"/gateway?token={alice}") as alice_ws:
+        alice_id = _receive(alice_ws, "READY")["user_id"]
+        with client.websocket_connect(f"/gateway?token={bob}") as bob_ws:
+            assert {"user_id": alice_id, "status": "online"} in _receive(bob_ws, "READY")["presences"]
+        with client.websocket_connect(f"/gateway?token={carol}") as carol_ws:
+            assert all(p["user_id"] != alice_id for p in _receive(carol_ws, "READY")["presences"])
+
+
+def test_leaving_a_channel_stops_typing(client: TestClient) -> None:
+    alice, bob = new_user(), new_user()
+    server_id, channel_id = create_channel(client, alice)
+    add_member(client, server_id, bob)
+
+    with client.websocket_connect(f"/gateway?token={alice}") as alice_ws:
+        with client.websocket_connect(f"/gateway?token={bob}") as bob_ws:
+            for ws in (alice_ws, bob_ws):
+                _receive(ws, "READY")
+                ws.send_json({"op": "join_channel", "d": {"channel_id": channel_id}})
+                _receive(ws, "CHANNEL_JOINED")
+
+            bob_ws.send_json({"op": "typing_start", "d": {"channel_id": channel_id}})
+            bob_id = _receive(alice_ws, "TYPING_START")["user_id"]
+            bob_ws.send_json({"op": "leave_channel", "d": {"channel_id": channel_id}})
+            assert _receive(alice_ws, "TYPING_STOP") == {"channel_id": channel_id, "user_id": bob_id}
+
+
+def test_typing_right_after_join_server_waits_for_the_join(client: TestClient) -> None:
+    alice = new_user()
+    server_id, channel_id = create_channel(client, alice)
+
+    with client.websocket_connect(f"/gateway?token={alice}") as ws:
+        _receive(ws, "READY")
+        # Sent back to back: the typing op lands on the channel's lane and must still see the join's subscriptions.
+        ws.send_json({"op": "join_server", "d": {"server_id": server_id}})
+        ws.send_json({"op": "typing_start", "d": {"channel_id": channel_id}})
+        seen = [ws.receive_json()["t"] for _ in range(2)]
+        assert seen == ["SERVER_JOINED", "TYPING_START"], seen
@@ -0,0 +1,60 @@
+import uuid
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.partitions import archive_before
+from app.db.session import AsyncSessionLocal, get_engine
+from app.models import Message
+from app.services.message_archive import message_archive
+from tests.conftest import auth, create_channel, new_user
+
+
+@pytest.fixture
+def archive_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setattr(message_archive, "root", tmp_path)
+    monkeypatch.setattr(message_archive, "_months", None)
+    return tmp_path
+
+
+def _insert_old(client: TestClient, channel_id: str, author_id: str, days: range) -> None:
+    channel, author = uuid.UUID(channel_id), uuid.UUID(author_id)
+
+    async def insert() -> None:
+        async with AsyncSessionLocal() as db:
+            for day in days:
+                created_at = datetime(2024, 1, day, tzinfo=UTC)
+                db.add(Message(channel_id=channel, author_id=author, content=f"d{day}", created_at=created_at))
+            await db.commit()
+
+    client.portal.call(insert)
+
+
+def _history(client: TestClient, user: str, channel_id: str) -> list[str]:
+    contents: list[str] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"before": cursor} if cursor else {})}
+        page = client.get(f"/api/v1/channels/{channel_id}/messages", params=params, headers=auth(user)).json()
+        contents += [message["content"] for message in page["items"]]
+        cursor = page["before"]
+        if not cursor:
+            return contents
+
+
+def test_archiving_a_month_twice_keeps_both_runs(client: TestClient, archive_root: Path) -> None:
+    user = new_user()
+    _, channel_id = create_channel(client, user)
+    author_id = client.get("/api/v1/me", headers=auth(user)).json()["id"]
+    cutoff = date(2024, 2, 1)
+
+    _insert_old(client, channel_id, author_id, range(1, 20, 2))
+    client.portal.call(archive_before, get_engine(), cutoff)
+    # Rows that show up late for an already archived month, interleaved with the first run's rows.
+    _insert_old(client, channel_id, author_id, range(2, 20, 2))
+    client.portal.call(archive_before, get_engine(), cutoff)
+
+    assert len(list((archive_root / "2024_01").glob(f"{channel_id}*.jsonl.gz"))) == 2
+    assert _history(client, user, channel_id) == [f"d{day}" for day in range(19, 0, -1)]
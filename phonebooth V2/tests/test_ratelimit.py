@@ -0,0 +1,27 @@
+from app.websocket.ratelimit import RateLimiter
+
+
+def _spend(limiter: RateLimiter, key: str, now: float) -> bool:
+    bucket = limiter.bucket(key, "send", now)
+    if bucket.retry_after() > 0:
+        return False
+    bucket.tokens -= 1
+    return True
+
+
+def test_an_empty_bucket_survives_eviction_pressure() -> None:
+    limiter = RateLimiter({"send": (2, 1.0)}, max_keys=1)
+    assert _spend(limiter, "a", 0.0) and _spend(limiter, "a", 0.0)
+    assert not _spend(limiter, "a", 0.0)
+
+    # Touching other keys must not evict "a" while it is still refilling, or its limit would reset.
+    for key in ("b", "c", "d"):
+        _spend(limiter, key, 0.1)
+    assert not _spend(limiter, "a", 0.2)
+
+
+def test_refilled_buckets_are_evicted() -> None:
+    limiter = RateLimiter({"send": (2, 1.0)}, max_keys=1)
+    _spend(limiter, "a", 0.0)
+    _spend(limiter, "b", 5.0)
+    assert ("a", "send") not in limiter._buckets
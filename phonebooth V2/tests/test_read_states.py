@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+
+from tests.conftest import auth, create_channel, new_user, post_message
+
+
+def _unread(client: TestClient, user: str, channel_id: str) -> int:
+    states = client.get("/api/v1/me/read-states", headers=auth(user)).json()
+    return next(state["unread_count"] for state in states if state["channel_id"] == channel_id)
+
+
+def test_unread_counts_follow_acks(client: TestClient) -> None:
+    user = new_user()
+    _, channel_id = create_channel(client, user)
+    ids = [post_message(client, user, channel_id, f"m{i}") for i in range(5)]
+    assert _unread(client, user, channel_id) == 5
+
+    assert client.post(f"/api/v1/channels/{channel_id}/messages/{ids[2]}/ack", headers=auth(user)).status_code == 204
+    assert _unread(client, user, channel_id) == 2
+
+    # An older ack never moves the marker back.
+    client.post(f"/api/v1/channels/{channel_id}/messages/{ids[0]}/ack", headers=auth(user))
+    assert _unread(client, user, channel_id) == 2
+
+
+def test_deleting_an_unread_message_lowers_unread(client: TestClient) -> None:
+    user = new_user()
+    _, channel_id = create_channel(client, user)
+    ids = [post_message(client, user, channel_id, f"m{i}") for i in range(3)]
+    client.post(f"/api/v1/channels/{channel_id}/messages/{ids[0]}/ack", headers=auth(user))
+
+    assert client.delete(f"/api/v1/channels/{channel_id}/messages/{ids[2]}", headers=auth(user)).status_code == 204
+    assert _unread(client, user, channel_id) == 1
+
+
+def test_deleting_a_read_message_keeps_later_messages_unread(client: TestClient) -> None:
+    user = new_user()
+    _, channel_id = create_channel(client, user)
+    message_id = post_message(client, user, channel_id, "read then deleted")
+    client.post(f"/api/v1/channels/{channel_id}/messages/{message_id}/ack", headers=auth(user))
+    assert _unread(client, user, channel_id) == 0
+
+    assert client.delete(f"/api/v1/channels/{channel_id}/messages/{message_id}", headers=auth(user)).status_code == 204
+    post_message(client, user, channel_id, "new")
+    assert _unread(client, user, channel_id) == 1
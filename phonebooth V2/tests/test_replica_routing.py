@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_read_db
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.session import AsyncSessionLocal, ReplicaSessionLocal, get_replica_engine, mark_writer, recent_writers
+from app.models import Channel, Server, ServerMember, User
+from tests.conftest import sqlite_url
+
+# The replica is a second SQLite file. Nothing copies rows into it, so a read it serves cannot see a write until the
+# test copies the row by hand; what a read returns shows which database served it.
+WINDOW = 0.3
+
+
+@pytest.fixture
+def replica(client: TestClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setenv("SUPABASE_DB_REPLICA_URL", sqlite_url(tmp_path / "replica.db"))
+    monkeypatch.setattr("app.db.session._replica_engine", None)
+    monkeypatch.setattr(recent_writers, "window", WINDOW)
+    get_settings.cache_clear()
+
+    async def create() -> None:
+        async with get_replica_engine().begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    client.portal.call(create)
+    yield
+    client.portal.call(get_replica_engine().dispose)
+    monkeypatch.delenv("SUPABASE_DB_REPLICA_URL")
+    get_settings.cache_clear()
+
+
+def _seed(client: TestClient) -> tuple[uuid.UUID, uuid.UUID, uuid.UUID]:
+    writer, reader, server_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    async def seed() -> None:
+        for factory in (AsyncSessionLocal, ReplicaSessionLocal):
+            async with factory() as db:
+                for user_id in (writer, reader):
+                    db.add(User(id=user_id, supabase_user_id=user_id, username=f"u{user_id.hex[:8]}"))
+                await db.flush()
+                db.add(Server(id=server_id, name="replica", owner_id=writer))
+                await db.flush()
+                db.add_all(ServerMember(server_id=server_id, user_id=user_id) for user_id in (writer, reader))
+                await db.commit()
+
+    client.portal.call(seed)
+    return writer, reader, server_id
+
+
+def _read(client: TestClient, user_id: uuid.UUID, server_id: uuid.UUID) -> tuple[str, list[str]]:
+    async def read() -> tuple[str, list[str]]:
+        async with AsyncSessionLocal() as db:
+            dependency = get_read_db(db=db, current_user=await db.get(User, user_id))
+            read_db: AsyncSession = await anext(dependency)
+            names = (await read_db.execute(select(Channel.name).where(Channel.server_id == server_id))).scalars().all()
+            await dependency.aclose()
+        return "primary" if read_db is db else "replica", sorted(names)
+
+    return client.portal.call(read)
+
+
+def _create_channel(client: TestClient, user_id: uuid.UUID, server_id: uuid.UUID, name: str, commit: bool = True) -> None:
+    async def create() -> None:
+        async with AsyncSessionLocal() as db:
+            mark_writer(db, user_id)
+            db.add(Channel(server_id=server_id, name=name))
+            await (db.commit() if commit else db.rollback())
+
+    client.portal.call(create)
+
+
+def test_idle_users_read_from_the_replica(client: TestClient, replica: None) -> None:
+    writer, reader, server_id = _seed(client)
+    assert _read(client, writer, server_id) == ("replica", [])
+    assert _read(client, reader, server_id) == ("replica", [])
+
+
+def test_writer_reads_its_own_write_from_the_primary_inside_the_window(client: TestClient, replica: None) -> None:
+    writer, reader, server_id = _seed(client)
+    _create_channel(client, writer, server_id, "general")
+
+    assert _read(client, writer, server_id) == ("primary", ["general"])
+    # Only the writer is pinned; everyone else keeps reading the (stale) replica.
+    assert _read(client, reader, server_id) == ("replica", [])
+
+    client.portal.call(asyncio.sleep, WINDOW)
+    assert _read(client, writer, server_id) == ("replica", [])
+
+
+def test_rolled_back_write_does_not_pin_to_the_primary(client: TestClient, replica: None) -> None:
+    writer, _, server_id = _seed(client)
+    _create_channel(client, writer, server_id, "rolled-back", commit=False)
+    assert _read(client, writer, server_id)[0] == "replica"
+
+
+def test_without_a_replica_everything_reads_from_the_primary(client: TestClient) -> None:
+    user = uuid.uuid4()
+
+    async def read() -> bool:
+        async with AsyncSessionLocal() as db:
+            dependency = get_read_db(db=db, current_user=User(id=user))
+            routed_to_primary = await anext(dependency) is db
+            await dependency.aclose()
+        return routed_to_primary
+
+    assert client.portal.call(read)